@@ -0,0 +1,106 @@
+# Benchmark del decodificador COMEXT (JSON -> DataFrame)
+# ----------------------------------------------------------------------------
+# Objetivo
+#   Compara el decodificador vectorizado `comext_json_to_labeled_df` con la
+#   versión original celda a celda sobre cubos sintéticos de 10^5 a 10^7
+#   celdas y comprueba que ambos producen el mismo resultado.
+#   Uso: python comext_benchmark.py [--sizes 100000 1000000] [--legacy-max N]
+# ----------------------------------------------------------------------------
+import argparse
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from comext_utils import comext_json_to_labeled_df
+
+
+def synthetic_doc(n_cells: int, density: float = 0.6, seed: int = 0) -> Dict[str, Any]:
+    # Cubo reporter x partner x product x flow x time con ~n_cells celdas
+    rng = np.random.default_rng(seed)
+    sizes = [2, 2, 1, 1, 1]
+    dim_ids = ["reporter", "partner", "product", "flow", "time"]
+    grow = [1, 2, 4]  # crecer product, partner, time por turnos
+    k = 0
+    while int(np.prod(sizes)) * density < n_cells:
+        sizes[grow[k % 3]] += 1
+        k += 1
+
+    dimension = {}
+    for dn, sz in zip(dim_ids, sizes):
+        codes = [f"{dn[:2].upper()}{i:05d}" for i in range(sz)]
+        dimension[dn] = {
+            "category": {
+                "index": {c: i for i, c in enumerate(codes)},
+                "label": {c: f"{dn} label {c}" for c in codes},
+            }
+        }
+
+    total = int(np.prod(sizes))
+    n = min(n_cells, total)
+    flat = np.sort(rng.choice(total, size=n, replace=False))
+    vals = np.round(rng.random(n) * 1e6, 1)
+    value = dict(zip(map(str, flat.tolist()), vals.tolist()))
+    return {"id": dim_ids, "size": sizes, "dimension": dimension, "value": value}
+
+
+def legacy_decoder(doc: Dict[str, Any]) -> pd.DataFrame:
+    # Implementación original celda a celda (referencia)
+    values_obj = doc.get("value")
+    if not values_obj:
+        return pd.DataFrame()
+    dim_ids: List[str] = list(doc.get("id", []))
+    sizes = [int(s) for s in doc.get("size", [])]
+    dims = doc.get("dimension", {})
+    strides = [int(np.prod(sizes[k + 1 :])) for k in range(len(sizes))]
+
+    dim_pos_to_code = {}
+    dim_code_to_label = {}
+    for dn in dim_ids:
+        cat = (dims.get(dn) or {}).get("category") or {}
+        dim_pos_to_code[dn] = {int(v): k for k, v in (cat.get("index") or {}).items()}
+        dim_code_to_label[dn] = {str(k): str(v) for k, v in (cat.get("label") or {}).items()}
+
+    records = []
+    for key, val in values_obj.items():
+        r = int(key)
+        rec = {"value": pd.to_numeric(val, errors="coerce")}
+        for k, dn in enumerate(dim_ids):
+            p, r = divmod(r, strides[k])
+            code = dim_pos_to_code[dn].get(p)
+            rec[dn] = code
+            rec[f"{dn}_label"] = dim_code_to_label[dn].get(code) if code is not None else None
+        records.append(rec)
+    return pd.DataFrame.from_records(records)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10**5, 10**6, 10**7])
+    parser.add_argument("--legacy-max", type=int, default=10**6, help="no ejecutar la versión original por encima de este tamaño")
+    args = parser.parse_args()
+
+    print(f"{'celdas':>10} {'vectorizado (s)':>16} {'original (s)':>13} {'MB cat':>8} {'MB obj':>8}")
+    for n in args.sizes:
+        doc = synthetic_doc(n)
+
+        t0 = time.perf_counter()
+        df = comext_json_to_labeled_df(doc)
+        t_new = time.perf_counter() - t0
+        mb_cat = df.memory_usage(deep=True).sum() / 1e6
+
+        t_old = float("nan")
+        mb_obj = float("nan")
+        if n <= args.legacy_max:
+            t0 = time.perf_counter()
+            ref = legacy_decoder(doc)
+            t_old = time.perf_counter() - t0
+            mb_obj = ref.memory_usage(deep=True).sum() / 1e6
+            pd.testing.assert_frame_equal(df.astype(object), ref.astype(object))
+
+        print(f"{len(df):>10} {t_new:>16.3f} {t_old:>13.3f} {mb_cat:>8.1f} {mb_obj:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
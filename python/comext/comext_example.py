@@ -2,11 +2,15 @@
 # ----------------------------------------------------------------------------
 # 1) Cargar la función
 # 2) Ejecutar la consulta con filtros (parámetros repetidos para multiselección)
-# 3) Guardar el resultado como CSV
+# 3) Guardar el resultado como CSV y en el almacén columnar (Parquet)
 # ----------------------------------------------------------------------------
 import os
+import sys
 from comext_function import comext_api_function
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from columnar_store import save_to_store  # noqa: E402
+
 
 def main() -> None:
     # Asegurar rutas relativas coherentes
@@ -27,6 +31,7 @@ def main() -> None:
 
     # Guardar el resultado
     df.to_csv("comext_example.csv", index=False)
+    save_to_store(df, "comext", "DS-059341")
 
 
 if __name__ == "__main__":
@@ -1,11 +1,25 @@
 from __future__ import annotations
 
-from typing import Dict, Iterable, List
+import math
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Union
 
 import pandas as pd
-import requests
 
-from comext_utils import comext_json_to_labeled_df
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from async_fetch import make_async  # noqa: E402
+from http_session import http_get  # noqa: E402
+from comext_utils import (  # noqa: E402
+    ComextCube,
+    comext_concat_labeled,
+    comext_json_to_cube,
+    comext_json_to_labeled_df,
+    comext_merge_cubes,
+    comext_stream_to_cube,
+    comext_stream_to_labeled_df,
+)
 
 
 def _build_query_params(filters: Dict[str, Iterable[str]]) -> List[tuple]:
@@ -18,17 +32,112 @@ def _build_query_params(filters: Dict[str, Iterable[str]]) -> List[tuple]:
     return params
 
 
-def comext_api_function(dataset_id: str, filters: Dict[str, Iterable[str]]) -> pd.DataFrame:
+def _estimate_cells(filters: Dict[str, Iterable[str]]) -> int:
+    # Tamaño del cubo = producto del nº de valores pedidos por dimensión
+    cells = 1
+    for values in filters.values():
+        if values is not None:
+            cells *= max(1, len(list(values)))
+    return cells
+
+
+def _partition_filters(
+    filters: Dict[str, Iterable[str]],
+    max_cells: int,
+    split_dims: Sequence[str] = ("product", "partner", "time"),
+) -> List[Dict[str, List[str]]]:
+    """
+    Dividir los filtros en subconsultas de como mucho max_cells celdas,
+    partiendo siempre por la dimensión (de split_dims) con más valores.
+    """
+    filters = {k: (list(v) if v is not None else None) for k, v in filters.items()}
+    cells = _estimate_cells(filters)
+    candidates = [d for d in split_dims if filters.get(d) and len(filters[d]) > 1]
+    if cells <= max_cells or not candidates:
+        return [filters]
+
+    dim = max(candidates, key=lambda d: len(filters[d]))
+    values = filters[dim]
+    n_parts = min(len(values), math.ceil(cells / max_cells))
+    step = math.ceil(len(values) / n_parts)
+
+    parts: List[Dict[str, List[str]]] = []
+    for i in range(0, len(values), step):
+        sub = dict(filters)
+        sub[dim] = values[i : i + step]
+        parts.extend(_partition_filters(sub, max_cells, split_dims))
+    return parts
+
+
+def _fetch(
+    base: str,
+    filters: Dict[str, Iterable[str]],
+    stream: bool,
+    chunk_size: int,
+    batch_chars: int,
+    output: str = "frame",
+) -> Union[pd.DataFrame, ComextCube]:
+    params = _build_query_params(filters)
+    resp = http_get("comext", base, params=params, headers={"Accept": "application/json"}, stream=stream)
+
+    with resp:
+        resp.raise_for_status()
+        if stream:
+            chunks = resp.iter_content(chunk_size=chunk_size)
+            if output == "cube":
+                return comext_stream_to_cube(chunks, batch_chars=batch_chars)
+            return comext_stream_to_labeled_df(chunks, batch_chars=batch_chars)
+        doc = resp.json()
+
+    if output == "cube":
+        return comext_json_to_cube(doc)
+    return comext_json_to_labeled_df(doc)
+
+
+def comext_api_function(
+    dataset_id: str,
+    filters: Dict[str, Iterable[str]],
+    stream: bool = False,
+    chunk_size: int = 1 << 16,
+    batch_chars: int = 1 << 20,
+    max_cells: Optional[int] = None,
+    max_workers: int = 4,
+    output: str = "frame",
+) -> Union[pd.DataFrame, ComextCube]:
+    """
+    Descargar datos COMEXT (JSON) y devolver un DataFrame etiquetado.
+
+    Con stream=True la respuesta se lee por trozos de chunk_size bytes y el
+    mapa 'value' se decodifica por lotes (batch_chars) sin construir el árbol
+    JSON completo; recomendable para extracciones grandes.
+
+    Si max_cells está definido y el cubo estimado a partir de 'filters' lo
+    supera, la consulta se divide por product, partner o time (la de más
+    valores) en subconsultas que se descargan en paralelo con hasta
+    max_workers hilos y se unen en un único DataFrame (o, con output="cube",
+    en un cubo cuyos ejes son la unión de los ejes de cada respuesta).
+
+    Con output="cube" se devuelve un ComextCube (array denso n-dimensional con
+    NaN en las celdas sin dato y coordenadas por eje) en lugar del formato
+    largo; cube.to_long() vuelve al DataFrame.
+    """
     if not isinstance(filters, dict) or not filters:
         raise ValueError("'filters' debe ser un dict nombrado: dimension -> lista de valores")
+    if output not in ("frame", "cube"):
+        raise ValueError("'output' debe ser 'frame' o 'cube'")
 
     base = f"https://ec.europa.eu/eurostat/api/comext/dissemination/statistics/1.0/data/{dataset_id}"
-    params = _build_query_params(filters)
-    resp = requests.get(base, params=params, headers={"Accept": "application/json"}, timeout=120)
-    resp.raise_for_status()
 
-    doc = resp.json()
-    df = comext_json_to_labeled_df(doc)
-    return df
+    parts = [filters] if max_cells is None else _partition_filters(filters, max_cells)
+    if len(parts) == 1:
+        return _fetch(base, parts[0], stream, chunk_size, batch_chars, output)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        results = list(pool.map(lambda f: _fetch(base, f, stream, chunk_size, batch_chars, output), parts))
+    if output == "cube":
+        # Ejes de cada respuesta (id/size/dimension), no solo los códigos con dato
+        return comext_merge_cubes(results, dims=list(filters))
+    return comext_concat_labeled(results)
 
 
+comext_api_function_async = make_async(comext_api_function, host="ec.europa.eu")
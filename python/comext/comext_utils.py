@@ -1,79 +1,543 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+import codecs
+import json
+import re
+from typing import Any, Dict, Iterable, List, Tuple, Union
 
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
 
 
-def _compute_strides(sizes: List[int]) -> List[int]:
-    n = len(sizes)
-    strides: List[int] = [0] * n
-    for k in range(n):
-        if k == n - 1:
-            strides[k] = 1
+def _dimension_positions(dim: Dict[str, Any], size: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Devuelve dos arrays (longitud = size) con el código y la etiqueta de cada
+    # posición de la dimensión; None donde el JSON no define la posición.
+    cat = (dim or {}).get("category") or {}
+    index_map = cat.get("index") or {}
+    labels = cat.get("label") or {}
+    if not isinstance(labels, dict):
+        labels = {}
+
+    codes = np.full(size, None, dtype=object)
+    for code, pos in index_map.items():
+        pos = int(pos)
+        if 0 <= pos < size:
+            codes[pos] = code
+
+    label_map = {str(k): str(v) for k, v in labels.items()}
+    pos_labels = np.array([label_map.get(c) if c is not None else None for c in codes], dtype=object)
+    return codes, pos_labels
+
+
+def _categorical_from_positions(per_position: np.ndarray, pos: np.ndarray) -> pd.Categorical:
+    # Factoriza los valores por posición (pocos) y reutiliza los códigos para
+    # todas las celdas (muchas) sin materializar cadenas repetidas.
+    fcodes, uniques = pd.factorize(per_position)
+    return pd.Categorical.from_codes(fcodes[pos], categories=uniques)
+
+
+def _labeled_frame(
+    flat_index: np.ndarray,
+    values: Any,
+    dim_ids: List[str],
+    sizes: List[int],
+    axes: List[Tuple[np.ndarray, np.ndarray]],
+    categorical: bool,
+) -> pd.DataFrame:
+    # axes[k] = (códigos, etiquetas) por posición de la dimensión k
+    flat_index = np.asarray(flat_index, dtype=np.int64)
+    positions = np.unravel_index(flat_index, sizes) if dim_ids else ()
+
+    data: Dict[str, Any] = {"value": pd.to_numeric(pd.Series(values), errors="coerce").to_numpy()}
+    for k, dn in enumerate(dim_ids):
+        codes, labels = axes[k]
+        pos = positions[k]
+        if categorical:
+            data[dn] = _categorical_from_positions(codes, pos)
+            data[f"{dn}_label"] = _categorical_from_positions(labels, pos)
         else:
-            prod = 1
-            for v in sizes[k + 1 :]:
-                prod *= int(v)
-            strides[k] = prod
-    return strides
+            data[dn] = codes[pos]
+            data[f"{dn}_label"] = labels[pos]
+
+    return pd.DataFrame(data)
+
+
+def _doc_axes(doc: Dict[str, Any]) -> Tuple[List[str], List[int], List[Tuple[np.ndarray, np.ndarray]]]:
+    dim_ids: List[str] = list(doc.get("id", []))
+    sizes = [int(s) for s in doc.get("size", [])]
+    dims = doc.get("dimension", {})
+    axes = [_dimension_positions(dims.get(dn), sizes[k]) for k, dn in enumerate(dim_ids)]
+    return dim_ids, sizes, axes
+
+
+def _doc_flat_values(doc: Dict[str, Any]) -> Tuple[np.ndarray, List[Any]]:
+    values_obj = doc.get("value") or {}
+    if isinstance(values_obj, dict):
+        flat_index = np.fromiter(map(int, values_obj.keys()), dtype=np.int64, count=len(values_obj))
+        values = list(values_obj.values())
+    else:
+        # JSON-stat también admite 'value' como lista densa (null = sin dato)
+        flat_index = np.array([i for i, v in enumerate(values_obj) if v is not None], dtype=np.int64)
+        values = [values_obj[i] for i in flat_index]
+    return flat_index, values
 
 
-def _invert_index_map(index_map: Dict[str, int]) -> Dict[int, str]:
-    # index_map is like {code: pos}; invert to {pos: code}
-    return {int(pos): code for code, pos in index_map.items()}
+def comext_arrays_to_labeled_df(
+    flat_index: np.ndarray,
+    values: Any,
+    doc: Dict[str, Any],
+    categorical: bool = True,
+) -> pd.DataFrame:
+    """
+    Construir el DataFrame etiquetado a partir de índices planos y valores.
+
+    flat_index y values son arrays alineados (una entrada por celda presente);
+    doc aporta id, size y dimension. Base común para el decodificador en memoria
+    y para el modo streaming.
+    """
+    dim_ids, sizes, axes = _doc_axes(doc)
+    return _labeled_frame(flat_index, values, dim_ids, sizes, axes, categorical)
 
 
-def comext_json_to_labeled_df(doc: Dict[str, Any]) -> pd.DataFrame:
+def comext_json_to_labeled_df(doc: Dict[str, Any], categorical: bool = True) -> pd.DataFrame:
     """
     Convert Eurostat COMEXT JSON (SDMX-like) to a labeled pandas DataFrame.
 
     Expected keys in doc: value (dict), id (list), size (list), dimension (dict)
+
+    Los índices planos se descomponen de una vez (np.unravel_index sobre size)
+    y los códigos/etiquetas se asignan por indexado de arrays. Con
+    categorical=True (por defecto) las columnas de código y *_label son
+    categóricas; con False se devuelven como cadenas (object).
     """
-    values_obj = doc.get("value")
-    if not values_obj:
+    if not doc.get("value"):
         return pd.DataFrame()
 
-    dim_ids: List[str] = list(doc.get("id", []))
-    sizes = [int(s) for s in doc.get("size", [])]
-    dims = doc.get("dimension", {})
-    num_dims = len(dim_ids)
-
-    strides = _compute_strides(sizes)
-
-    # Prepare per-dimension inverted index maps and labels
-    dim_pos_to_code: Dict[str, Dict[int, str]] = {}
-    dim_code_to_label: Dict[str, Dict[str, str]] = {}
-    for dn in dim_ids:
-        d = dims.get(dn) or {}
-        cat = d.get("category") or {}
-        index_map = cat.get("index") or {}
-        labels = cat.get("label") or {}
-        dim_pos_to_code[dn] = _invert_index_map({k: int(v) for k, v in index_map.items()})
-        dim_code_to_label[dn] = {str(k): str(v) for k, v in labels.items()} if isinstance(labels, dict) else {}
-
-    value_keys = [int(k) for k in values_obj.keys()]
-    value_vals = list(values_obj.values())
-
-    records: List[Dict[str, Any]] = []
-    for i, idx in enumerate(value_keys):
-        r = int(idx)
-        pos: List[int] = [0] * num_dims
-        for k in range(num_dims):
-            stride = strides[k]
-            pos[k] = r // stride
-            r = r % stride
-
-        rec: Dict[str, Any] = {"value": pd.to_numeric(value_vals[i], errors="coerce")}
-        for k, dn in enumerate(dim_ids):
-            code = dim_pos_to_code.get(dn, {}).get(pos[k])
-            rec[dn] = code
-            lbl_map = dim_code_to_label.get(dn, {})
-            rec[f"{dn}_label"] = lbl_map.get(code) if code is not None else None
-
-        records.append(rec)
-
-    df = pd.DataFrame.from_records(records)
-    return df
+    flat_index, values = _doc_flat_values(doc)
+    return comext_arrays_to_labeled_df(flat_index, values, doc, categorical=categorical)
+
+
+class ComextCube:
+    """
+    Cubo denso COMEXT: array n-dimensional de valores (NaN = sin dato) con
+    coordenadas por eje.
+
+    Atributos
+    ---------
+    values : numpy.ndarray
+        Array float64 de forma 'shape' (una dimensión por elemento de 'dims').
+    dims : list[str]
+        Nombres de las dimensiones, en el orden de los ejes.
+    codes, labels : dict[str, numpy.ndarray]
+        Código y etiqueta de cada posición de cada eje (None si no definida).
+    """
+
+    def __init__(self, values: np.ndarray, dims: List[str], codes: Dict[str, np.ndarray], labels: Dict[str, np.ndarray]) -> None:
+        self.values = values
+        self.dims = list(dims)
+        self.codes = codes
+        self.labels = labels
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.values.shape
+
+    def axis(self, dim: str) -> int:
+        return self.dims.index(dim)
+
+    def to_long(self, dropna: bool = True, categorical: bool = True) -> pd.DataFrame:
+        return comext_cube_to_labeled_df(self, dropna=dropna, categorical=categorical)
+
+    def __repr__(self) -> str:
+        dims = ", ".join(f"{d}={n}" for d, n in zip(self.dims, self.shape))
+        return f"ComextCube({dims})"
+
+
+def comext_arrays_to_cube(flat_index: np.ndarray, values: Any, doc: Dict[str, Any]) -> ComextCube:
+    """
+    Construir un ComextCube por asignación directa de los índices planos
+    sobre un array denso de forma 'size' inicializado a NaN.
+    """
+    dim_ids, sizes, axes = _doc_axes(doc)
+    dense = np.full(int(np.prod(sizes, dtype=np.int64)), np.nan, dtype=np.float64)
+    dense[np.asarray(flat_index, dtype=np.int64)] = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=np.float64)
+    return ComextCube(
+        dense.reshape(sizes),
+        dim_ids,
+        {dn: axes[k][0] for k, dn in enumerate(dim_ids)},
+        {dn: axes[k][1] for k, dn in enumerate(dim_ids)},
+    )
+
+
+def comext_json_to_cube(doc: Dict[str, Any]) -> ComextCube:
+    """Convertir el JSON de COMEXT directamente en un ComextCube."""
+    flat_index, values = _doc_flat_values(doc)
+    return comext_arrays_to_cube(flat_index, values, doc)
+
+
+def comext_cube_to_labeled_df(cube: ComextCube, dropna: bool = True, categorical: bool = True) -> pd.DataFrame:
+    """
+    Pasar un ComextCube al formato largo de comext_json_to_labeled_df
+    (value, <dim>, <dim>_label). Con dropna=True se omiten las celdas NaN.
+    """
+    flat = cube.values.ravel()
+    flat_index = np.flatnonzero(~np.isnan(flat)) if dropna else np.arange(flat.size, dtype=np.int64)
+    if flat_index.size == 0:
+        return pd.DataFrame()
+    axes = [(cube.codes[dn], cube.labels[dn]) for dn in cube.dims]
+    return _labeled_frame(flat_index, flat[flat_index], cube.dims, list(cube.shape), axes, categorical)
+
+
+def comext_labeled_df_to_cube(df: pd.DataFrame, dims: List[str] | None = None) -> ComextCube:
+    """
+    Pasar un DataFrame largo (value, <dim>, <dim>_label) a ComextCube.
+    Los ejes son los valores distintos de cada dimensión.
+    """
+    if dims is None:
+        dims = [c for c in df.columns if c != "value" and not str(c).endswith("_label")]
+
+    positions: List[np.ndarray] = []
+    codes: Dict[str, np.ndarray] = {}
+    labels: Dict[str, np.ndarray] = {}
+    for dn in dims:
+        pos, uniques = pd.factorize(df[dn])
+        codes[dn] = np.asarray(uniques, dtype=object)
+        lab = np.full(len(uniques), None, dtype=object)
+        if f"{dn}_label" in df.columns:
+            valid = pos >= 0
+            lab[pos[valid]] = df[f"{dn}_label"].to_numpy(dtype=object)[valid]
+        labels[dn] = lab
+        positions.append(pos)
+
+    shape = [len(codes[dn]) for dn in dims]
+    dense = np.full(shape, np.nan, dtype=np.float64)
+    valid = np.all([p >= 0 for p in positions], axis=0) if positions else np.ones(len(df), dtype=bool)
+    values = pd.to_numeric(df["value"], errors="coerce").to_numpy(dtype=np.float64)
+    if positions:
+        dense[tuple(p[valid] for p in positions)] = values[valid]
+    return ComextCube(dense, dims, codes, labels)
+
+
+def comext_merge_cubes(cubes: Iterable[ComextCube], dims: List[str] | None = None) -> ComextCube:
+    """
+    Unir cubos de consultas parciales en un único ComextCube.
+
+    Cada eje es la unión de los ejes de los cubos (en orden de aparición),
+    de modo que el resultado tiene las mismas coordenadas que una consulta
+    única aunque alguna parte no tenga datos. Si ningún cubo trae ejes se
+    devuelve un cubo vacío con las dimensiones de 'dims'.
+    """
+    cubes = [c for c in cubes if c.dims]
+    if not cubes:
+        dims = list(dims or [])
+        empty = {dn: np.empty(0, dtype=object) for dn in dims}
+        return ComextCube(np.empty((0,) * len(dims), dtype=np.float64), dims, empty, dict(empty))
+    if len(cubes) == 1:
+        return cubes[0]
+
+    out_dims = cubes[0].dims
+    codes: Dict[str, np.ndarray] = {}
+    labels: Dict[str, np.ndarray] = {}
+    maps: List[List[np.ndarray]] = [[] for _ in cubes]
+    for dn in out_dims:
+        order: Dict[Any, int] = {}
+        axis_labels: List[Any] = []
+        for i, cube in enumerate(cubes):
+            pos = np.empty(len(cube.codes[dn]), dtype=np.int64)
+            for j, (code, label) in enumerate(zip(cube.codes[dn], cube.labels[dn])):
+                k = order.get(code)
+                if k is None:
+                    k = order[code] = len(axis_labels)
+                    axis_labels.append(label)
+                elif axis_labels[k] is None:
+                    axis_labels[k] = label
+                pos[j] = k
+            maps[i].append(pos)
+        codes[dn] = np.array(list(order), dtype=object)
+        labels[dn] = np.array(axis_labels, dtype=object)
+
+    dense = np.full([len(codes[dn]) for dn in out_dims], np.nan, dtype=np.float64)
+    for cube, cube_maps in zip(cubes, maps):
+        values = cube.values.transpose([cube.dims.index(dn) for dn in out_dims])
+        target = np.ix_(*cube_maps)
+        dense[target] = np.where(np.isnan(values), dense[target], values)
+    return ComextCube(dense, out_dims, codes, labels)
+
+
+def comext_concat_labeled(frames: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenar DataFrames etiquetados (p. ej. de consultas parciales)
+    conservando las columnas categóricas con la unión de sus categorías.
+    """
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+
+    data: Dict[str, Any] = {}
+    for col in frames[0].columns:
+        parts = [f[col] for f in frames]
+        if all(isinstance(p.dtype, pd.CategoricalDtype) for p in parts):
+            data[col] = union_categoricals(parts)
+        else:
+            data[col] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(data)
+
+
+_WS = re.compile(r"\s*")
+_JSON_KEY = re.compile(r'"((?:[^"\\]|\\.)*)"')
+_STRUCT = re.compile(r'[{}\[\]"]')
+_STR_END = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r"[,}\]\s]")
+
+
+class _ComextStreamParser:
+    """
+    Parser incremental del JSON de COMEXT.
+
+    Recibe el texto por trozos (feed) y recorre solo el objeto de primer
+    nivel: guarda id, size y dimension, descarta status y el resto de claves
+    sin construir objetos Python, y decodifica el mapa 'value' por lotes de
+    ~batch_chars caracteres directamente en buffers numpy (int64 / float64).
+    Se asume, como en COMEXT, que los valores de 'value' son numéricos o null.
+    """
+
+    _KEEP = ("id", "size", "dimension")
+
+    def __init__(self, batch_chars: int = 1 << 20) -> None:
+        self.batch_chars = int(batch_chars)
+        self.meta: Dict[str, Any] = {}
+        self.index_chunks: List[np.ndarray] = []
+        self.value_chunks: List[np.ndarray] = []
+        self._buf = ""
+        self._state = "start"
+        self._key: str | None = None
+        self._reset_value()
+
+    def _reset_value(self) -> None:
+        self._pieces: List[str] = []
+        self._started = False
+        self._scalar = False
+        self._depth = 0
+        self._in_str = False
+        self._value_kind: str | None = None
+        self._list_offset = 0
+
+    def feed(self, text: str) -> None:
+        self._buf += text
+        pos = self._run(0)
+        self._buf = self._buf[pos:]
+
+    def close(self) -> Tuple[np.ndarray, np.ndarray, Dict[str, Any]]:
+        if self._state != "done":
+            raise ValueError("Respuesta COMEXT JSON incompleta o mal formada")
+        idx = np.concatenate(self.index_chunks) if self.index_chunks else np.empty(0, dtype=np.int64)
+        vals = np.concatenate(self.value_chunks) if self.value_chunks else np.empty(0, dtype=np.float64)
+        self.index_chunks, self.value_chunks = [], []
+        return idx, vals, self.meta
+
+    def _run(self, pos: int) -> int:
+        buf = self._buf
+        n = len(buf)
+        while True:
+            if self._state == "done":
+                return n
+            if self._state == "value":
+                if self._key == "value":
+                    pos, finished = self._scan_values(pos)
+                else:
+                    pos, finished = self._scan_generic(pos, capture=self._key in self._KEEP)
+                if not finished:
+                    return pos
+                self._state = "sep"
+                continue
+
+            pos = _WS.match(buf, pos).end()
+            if pos >= n:
+                return pos
+            c = buf[pos]
+            if self._state == "start":
+                if c != "{":
+                    raise ValueError("Se esperaba un objeto JSON en la respuesta COMEXT")
+                self._state = "key"
+                pos += 1
+            elif self._state == "key":
+                if c == "}":
+                    self._state = "done"
+                    return n
+                m = _JSON_KEY.match(buf, pos)
+                if m is None:
+                    return pos  # clave incompleta: esperar más texto
+                self._key = json.loads(m.group(0))
+                self._state = "colon"
+                pos = m.end()
+            elif self._state == "colon":
+                if c != ":":
+                    raise ValueError("JSON COMEXT mal formado (se esperaba ':')")
+                self._state = "value"
+                self._reset_value()
+                pos += 1
+            elif self._state == "sep":
+                if c == ",":
+                    self._state = "key"
+                elif c == "}":
+                    self._state = "done"
+                    return n
+                else:
+                    raise ValueError("JSON COMEXT mal formado (se esperaba ',' o '}')")
+                pos += 1
+
+    def _scan_generic(self, pos: int, capture: bool) -> Tuple[int, bool]:
+        # Avanza sobre un valor JSON arbitrario siguiendo solo la estructura
+        # ({}[] y cadenas); si capture=True guarda el texto para json.loads.
+        buf = self._buf
+        n = len(buf)
+        if not self._started:
+            pos = _WS.match(buf, pos).end()
+            if pos >= n:
+                return pos, False
+            self._started = True
+            start = pos
+            c = buf[pos]
+            if c in "{[":
+                self._depth = 1
+                pos += 1
+            elif c == '"':
+                self._in_str = True
+                pos += 1
+            else:
+                self._scalar = True
+        else:
+            start = pos
+
+        finished = False
+        while not finished:
+            if self._scalar:
+                m = _SCALAR_END.search(buf, pos)
+                if m is None:
+                    pos = n
+                    break
+                pos = m.start()
+                finished = True
+            elif self._in_str:
+                m = _STR_END.search(buf, pos)
+                if m is None:
+                    pos = n
+                    break
+                if m.group() == "\\":
+                    if m.end() >= n:
+                        pos = m.start()  # escape partido entre trozos
+                        break
+                    pos = m.end() + 1
+                    continue
+                self._in_str = False
+                pos = m.end()
+                finished = self._depth == 0
+            else:
+                m = _STRUCT.search(buf, pos)
+                if m is None:
+                    pos = n
+                    break
+                c = m.group()
+                pos = m.end()
+                if c == '"':
+                    self._in_str = True
+                elif c in "{[":
+                    self._depth += 1
+                else:
+                    self._depth -= 1
+                    finished = self._depth == 0
+
+        if capture:
+            self._pieces.append(buf[start:pos])
+            if finished:
+                self.meta[self._key] = json.loads("".join(self._pieces))
+                self._pieces = []
+        return pos, finished
+
+    def _scan_values(self, pos: int) -> Tuple[int, bool]:
+        buf = self._buf
+        n = len(buf)
+        if self._value_kind is None:
+            pos = _WS.match(buf, pos).end()
+            if pos >= n:
+                return pos, False
+            c = buf[pos]
+            if c not in "{[":
+                # value nulo u otro escalar: no hay celdas
+                return self._scan_generic(pos, capture=False)
+            self._value_kind = c
+            pos += 1
+
+        end = buf.find("}" if self._value_kind == "{" else "]", pos)
+        if end >= 0:
+            self._decode_batch(buf[pos:end])
+            return end + 1, True
+        if n - pos >= self.batch_chars:
+            cut = buf.rfind(",", pos)
+            if cut > pos:
+                self._decode_batch(buf[pos:cut])
+                pos = cut + 1
+        return pos, False
+
+    def _decode_batch(self, segment: str) -> None:
+        if not segment.strip():
+            return
+        if self._value_kind == "{":
+            batch = json.loads("{" + segment + "}")
+            idx = np.fromiter(map(int, batch.keys()), dtype=np.int64, count=len(batch))
+            raw = list(batch.values())
+        else:
+            raw_all = json.loads("[" + segment + "]")
+            keep = [i for i, v in enumerate(raw_all) if v is not None]
+            idx = np.asarray(keep, dtype=np.int64) + self._list_offset
+            self._list_offset += len(raw_all)
+            raw = [raw_all[i] for i in keep]
+        vals = pd.to_numeric(pd.Series(raw, dtype=object), errors="coerce").to_numpy(dtype=np.float64)
+        self.index_chunks.append(idx)
+        self.value_chunks.append(vals)
+
+
+def _parse_comext_stream(
+    chunks: Iterable[Union[str, bytes]],
+    batch_chars: int = 1 << 20,
+    encoding: str = "utf-8",
+) -> Tuple[np.ndarray, np.ndarray, Dict[str, Any]]:
+    parser = _ComextStreamParser(batch_chars=batch_chars)
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            chunk = decoder.decode(chunk)
+        if chunk:
+            parser.feed(chunk)
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        parser.feed(tail)
+    return parser.close()
+
+
+def comext_stream_to_labeled_df(
+    chunks: Iterable[Union[str, bytes]],
+    batch_chars: int = 1 << 20,
+    categorical: bool = True,
+) -> pd.DataFrame:
+    """
+    Variante streaming de comext_json_to_labeled_df.
+
+    chunks es un iterable de trozos (bytes UTF-8 o str) del cuerpo JSON, p. ej.
+    resp.iter_content(). El mapa 'value' se decodifica por lotes en buffers
+    tipados, de modo que la memoria máxima crece con el resultado y no con el
+    árbol JSON completo. La columna value es siempre float64.
+    """
+    flat_index, values, meta = _parse_comext_stream(chunks, batch_chars=batch_chars)
+    if flat_index.size == 0:
+        return pd.DataFrame()
+    return comext_arrays_to_labeled_df(flat_index, values, meta, categorical=categorical)
 
 
+def comext_stream_to_cube(chunks: Iterable[Union[str, bytes]], batch_chars: int = 1 << 20) -> ComextCube:
+    """Variante streaming de comext_json_to_cube."""
+    flat_index, values, meta = _parse_comext_stream(chunks, batch_chars=batch_chars)
+    return comext_arrays_to_cube(flat_index, values, meta)
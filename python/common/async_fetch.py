@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+
+from http_session import DEFAULT_HOST_LIMIT, HOST_LIMITS
+
+# Hilos donde se ejecutan descarga y parseo (fuera del bucle de eventos)
+MAX_THREADS = 32
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_THREADS, thread_name_prefix="apis-async")
+        return _executor
+
+
+def host_semaphore(host: str) -> asyncio.Semaphore:
+    """
+    Semáforo del host en el bucle de eventos actual (límite en HOST_LIMITS):
+    limita las llamadas en curso para no ocupar hilos del pool esperando.
+    El límite de peticiones HTTP simultáneas lo aplica http_get.
+    """
+    loop = asyncio.get_running_loop()
+    per_loop = _semaphores.setdefault(loop, {})
+    sem = per_loop.get(host)
+    if sem is None:
+        sem = per_loop[host] = asyncio.Semaphore(max(1, HOST_LIMITS.get(host, DEFAULT_HOST_LIMIT)))
+    return sem
+
+
+async def run_limited(host: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Ejecutar func(*args, **kwargs) en el pool de hilos respetando el límite
+    de peticiones simultáneas de host. La descarga (sesión HTTP compartida)
+    y el parseo a DataFrame ocurren en el hilo, sin bloquear el bucle.
+    """
+    async with host_semaphore(host):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def make_async(func: Callable[..., Any], host: str) -> Callable[..., Awaitable[Any]]:
+    """
+    Versión asíncrona de una función de descarga (mismos parámetros). Si la
+    llamada incluye base_url, el límite se aplica al host de esa URL.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        target = urlsplit(kwargs["base_url"]).netloc if kwargs.get("base_url") else host
+        return await run_limited(target, func, *args, **kwargs)
+
+    wrapper.__name__ = f"{func.__name__}_async"
+    wrapper.__qualname__ = wrapper.__name__
+    wrapper.host = host  # type: ignore[attr-defined]
+    return wrapper
+
+
+async def fetch_many(
+    specs: Iterable[Dict[str, Any]],
+    return_exceptions: bool = False,
+) -> AsyncIterator[Tuple[Any, Any]]:
+    """
+    Lanzar muchas descargas (de cualquier fuente) a la vez y devolver cada
+    resultado en cuanto termina.
+
+    Cada spec es un dict con:
+    - 'function': función asíncrona de una fuente (p. ej. ecb_api_function_async).
+    - 'args' (tupla) y 'kwargs' (dict), opcionales: sus argumentos.
+    - 'key', opcional: identificador que acompaña al resultado (por defecto
+      la posición de la spec).
+
+    Genera tuplas (key, DataFrame) en orden de finalización. Con
+    return_exceptions=True un fallo se entrega como (key, excepción); si no,
+    se cancelan las descargas pendientes y se relanza.
+    """
+
+    async def run(key: Any, spec: Dict[str, Any]) -> Tuple[Any, Any]:
+        try:
+            return key, await spec["function"](*spec.get("args", ()), **spec.get("kwargs", {}))
+        except Exception as exc:
+            if not return_exceptions:
+                raise
+            return key, exc
+
+    tasks = [asyncio.ensure_future(run(spec.get("key", i), spec)) for i, spec in enumerate(specs)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import json
+import os
+from datetime import date as _date
+from typing import Any, Dict, List, Optional, Sequence, Union
+from urllib.parse import quote, unquote
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow es opcional en el resto del repo
+    pa = None
+
+# Extensión de fichero de cada formato
+FORMATS = {"parquet": "parquet", "arrow": "arrow"}
+
+_ATTRS_KEY = b"apis.attrs"
+
+
+def _part(name: str, value: str) -> str:
+    # Nombre de carpeta estilo Hive (clave=valor), con el valor escapado
+    return f"{name}={quote(str(value), safe='@.+-_')}"
+
+
+def _unpart(folder: str) -> str:
+    return unquote(folder.split("=", 1)[1])
+
+
+class ColumnarStore:
+    """
+    Almacén columnar de resultados (Parquet o Arrow IPC) particionado por
+    fuente, dataset y fecha de descarga:
+
+        root/provider=<fuente>/dataset=<dataset>/date=<YYYY-MM-DD>/data.<parquet|arrow>
+
+    Conserva los tipos del DataFrame (categorías, float64, fechas) y sus
+    attrs. La lectura usa memory-map y solo carga las columnas pedidas; con
+    Arrow IPC (sin compresión) las columnas se leen directamente del mapa de
+    memoria sin copias.
+
+    - root: carpeta del almacén (por defecto ~/.cache/apis/store).
+    - format: "parquet" (comprimido, por defecto) o "arrow" (IPC/Feather v2,
+      lectura más rápida a cambio de más espacio en disco).
+    """
+
+    def __init__(self, root: Optional[str] = None, format: str = "parquet") -> None:
+        if pa is None:
+            raise ImportError("ColumnarStore requiere pyarrow (pip install pyarrow)")
+        if format not in FORMATS:
+            raise ValueError(f"format debe ser uno de {sorted(FORMATS)}")
+        if root is None:
+            root = os.path.join(os.path.expanduser("~"), ".cache", "apis", "store")
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.format = format
+
+    def _dir(self, provider: str, dataset: str, date: Optional[str] = None) -> str:
+        parts = [self.root, _part("provider", provider), _part("dataset", dataset)]
+        if date is not None:
+            parts.append(_part("date", date))
+        return os.path.join(*parts)
+
+    def write(
+        self,
+        df: pd.DataFrame,
+        provider: str,
+        dataset: str,
+        date: Union[str, _date, None] = None,
+        format: Optional[str] = None,
+    ) -> str:
+        """
+        Guardar df en la partición provider/dataset/date (por defecto la
+        fecha de hoy), sustituyendo la que hubiera. Retorna la ruta escrita.
+        """
+        fmt = format or self.format
+        if fmt not in FORMATS:
+            raise ValueError(f"format debe ser uno de {sorted(FORMATS)}")
+        date = str(date or _date.today().isoformat())
+        folder = self._dir(provider, dataset, date)
+        os.makedirs(folder, exist_ok=True)
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if df.attrs:
+            meta = dict(table.schema.metadata or {})
+            meta[_ATTRS_KEY] = json.dumps(df.attrs, default=str).encode("utf-8")
+            table = table.replace_schema_metadata(meta)
+
+        path = os.path.join(folder, f"data.{FORMATS[fmt]}")
+        tmp = f"{path}.tmp"
+        if fmt == "parquet":
+            pq.write_table(table, tmp, compression="zstd")
+        else:
+            feather.write_feather(table, tmp, compression="uncompressed")
+        os.replace(tmp, path)
+        # Quitar la versión en el otro formato, si existía
+        for other in FORMATS.values():
+            stale = os.path.join(folder, f"data.{other}")
+            if other != FORMATS[fmt] and os.path.exists(stale):
+                os.remove(stale)
+        return path
+
+    def dates(self, provider: str, dataset: str) -> List[str]:
+        """Fechas guardadas de un dataset, de la más antigua a la más reciente."""
+        folder = self._dir(provider, dataset)
+        if not os.path.isdir(folder):
+            return []
+        return sorted(_unpart(d) for d in os.listdir(folder) if d.startswith("date=") and self._file(os.path.join(folder, d)))
+
+    @staticmethod
+    def _file(folder: str) -> Optional[str]:
+        for ext in FORMATS.values():
+            path = os.path.join(folder, f"data.{ext}")
+            if os.path.exists(path):
+                return path
+        return None
+
+    def read_arrow(
+        self,
+        provider: str,
+        dataset: str,
+        date: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> "pa.Table":
+        """
+        Tabla Arrow de una partición (por defecto la fecha más reciente) con
+        solo las columnas pedidas, leída con memory-map.
+        """
+        if date is None:
+            available = self.dates(provider, dataset)
+            if not available:
+                raise FileNotFoundError(f"No hay datos de {provider}/{dataset} en {self.root}")
+            date = available[-1]
+        path = self._file(self._dir(provider, dataset, str(date)))
+        if path is None:
+            raise FileNotFoundError(f"No hay datos de {provider}/{dataset} con fecha {date} en {self.root}")
+        cols = list(columns) if columns is not None else None
+        if path.endswith(".parquet"):
+            return pq.read_table(path, columns=cols, memory_map=True)
+        with pa.memory_map(path, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+        return table.select(cols) if cols is not None else table
+
+    def read(
+        self,
+        provider: str,
+        dataset: str,
+        date: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        DataFrame de una partición (por defecto la más reciente) con sus
+        tipos y attrs originales. columns limita las columnas leídas.
+        """
+        table = self.read_arrow(provider, dataset, date=date, columns=columns)
+        raw = (table.schema.metadata or {}).get(_ATTRS_KEY)
+        df = table.to_pandas(split_blocks=True, self_destruct=True)
+        if raw:
+            df.attrs.update(json.loads(raw))
+        return df
+
+    def read_all(
+        self,
+        provider: str,
+        dataset: str,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """Todas las fechas de un dataset concatenadas, con una columna 'date'."""
+        frames = []
+        for d in self.dates(provider, dataset):
+            df = self.read(provider, dataset, date=d, columns=columns)
+            df.insert(0, "date", d)
+            frames.append(df)
+        if not frames:
+            raise FileNotFoundError(f"No hay datos de {provider}/{dataset} en {self.root}")
+        return pd.concat(frames, ignore_index=True)
+
+    def partitions(self, provider: Optional[str] = None) -> pd.DataFrame:
+        """Inventario del almacén: provider, dataset, date, format, rows, bytes y path."""
+        rows: List[Dict[str, Any]] = []
+        for pdir in sorted(os.listdir(self.root)):
+            if not pdir.startswith("provider=") or (provider is not None and _unpart(pdir) != provider):
+                continue
+            for ddir in sorted(os.listdir(os.path.join(self.root, pdir))):
+                if not ddir.startswith("dataset="):
+                    continue
+                for date in self.dates(_unpart(pdir), _unpart(ddir)):
+                    path = self._file(self._dir(_unpart(pdir), _unpart(ddir), date))
+                    if path.endswith(".parquet"):
+                        n = pq.ParquetFile(path).metadata.num_rows
+                    else:
+                        with pa.memory_map(path, "r") as source:
+                            reader = pa.ipc.open_file(source)
+                            n = sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+                    rows.append(
+                        {
+                            "provider": _unpart(pdir),
+                            "dataset": _unpart(ddir),
+                            "date": date,
+                            "format": os.path.splitext(path)[1][1:],
+                            "rows": n,
+                            "bytes": os.path.getsize(path),
+                            "path": path,
+                        }
+                    )
+        return pd.DataFrame(rows, columns=["provider", "dataset", "date", "format", "rows", "bytes", "path"])
+
+
+def save_to_store(
+    df: pd.DataFrame,
+    provider: str,
+    dataset: str,
+    root: Optional[str] = None,
+    date: Union[str, _date, None] = None,
+    format: str = "parquet",
+) -> Optional[str]:
+    """
+    Guardar df en el almacén columnar solo si pyarrow está instalado (uso
+    opcional, p. ej. en los ejemplos). Retorna la ruta escrita, o None sin
+    pyarrow.
+    """
+    if pa is None:
+        return None
+    return ColumnarStore(root, format=format).write(df, provider, dataset, date=date)
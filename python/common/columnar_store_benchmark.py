@@ -0,0 +1,87 @@
+# Benchmark del almacén columnar (ColumnarStore)
+# ----------------------------------------------------------------------------
+# Objetivo
+#   Compara releer un resultado grande (forma de COMEXT/Eurostat: dimensiones
+#   categóricas + periodo + valor) desde CSV frente a Parquet y Arrow IPC
+#   del almacén, completo y solo con dos columnas: tiempo, memoria nueva
+#   asignada y tamaño en disco.
+#   Uso: python columnar_store_benchmark.py [--rows 2000000]
+# ----------------------------------------------------------------------------
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from columnar_store import ColumnarStore
+
+
+def synthetic_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+
+    def cat(prefix: str, n: int) -> pd.Categorical:
+        return pd.Categorical.from_codes(rng.integers(0, n, rows), [f"{prefix}{i:04d}" for i in range(n)])
+
+    return pd.DataFrame(
+        {
+            "reporter": cat("R", 27),
+            "partner": cat("P", 250),
+            "product": cat("PR", 5000),
+            "flow": cat("F", 2),
+            "TIME_PERIOD": cat("2020-", 60),
+            "OBS_VALUE": rng.random(rows) * 1e6,
+        }
+    )
+
+
+def timed(label: str, func, path: str, repeat: int = 3) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        df = func()
+        best = min(best, time.perf_counter() - t0)
+        del df
+    # Memoria nueva retenida por el resultado: arrays de numpy/Python
+    # (tracemalloc) + pool de Arrow; lo que queda en el memory-map no cuenta
+    pool0 = pa.total_allocated_bytes()
+    tracemalloc.start()
+    df = func()
+    mem = tracemalloc.get_traced_memory()[0] + pa.total_allocated_bytes() - pool0
+    tracemalloc.stop()
+    del df
+    print(f"{label:<34} {best * 1000:>9.1f} ms {mem / 1e6:>9.1f} MB memoria {os.path.getsize(path) / 1e6:>8.1f} MB disco")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    df = synthetic_frame(args.rows)
+    with tempfile.TemporaryDirectory() as root:
+        store = ColumnarStore(root)
+        csv = os.path.join(root, "data.csv")
+        df.to_csv(csv, index=False)
+        parquet = store.write(df, "comext", "DS-045409", date="2024-01-01")
+        arrow = store.write(df, "comext", "DS-045409", date="2024-01-02", format="arrow")
+        two = ["partner", "OBS_VALUE"]
+
+        print(f"Resultado sintético: {args.rows} filas")
+        timed("CSV pd.read_csv", lambda: pd.read_csv(csv), csv)
+        timed("CSV pd.read_csv (2 columnas)", lambda: pd.read_csv(csv, usecols=two), csv)
+        timed("Parquet read", lambda: store.read("comext", "DS-045409", date="2024-01-01"), parquet)
+        timed("Parquet read (2 columnas)", lambda: store.read("comext", "DS-045409", date="2024-01-01", columns=two), parquet)
+        timed("Arrow IPC read", lambda: store.read("comext", "DS-045409", date="2024-01-02"), arrow)
+        timed("Arrow IPC read (2 columnas)", lambda: store.read("comext", "DS-045409", date="2024-01-02", columns=two), arrow)
+        timed("Arrow IPC read_arrow (2 columnas)", lambda: store.read_arrow("comext", "DS-045409", date="2024-01-02", columns=two), arrow)
+
+        back = store.read("comext", "DS-045409", date="2024-01-02")
+        assert back.dtypes.equals(df.dtypes) and back.equals(df)
+
+
+if __name__ == "__main__":
+    main()
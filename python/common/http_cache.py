@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+
+from http_session import http_get
+
+
+class ValidatingCache:
+    """
+    Caché HTTP con revalidación condicional (ETag / Last-Modified).
+
+    Guarda en disco, por cada petición (URL + parámetros + Accept), el cuerpo
+    de la respuesta, sus validadores y el DataFrame ya parseado. En las
+    llamadas siguientes envía If-None-Match / If-Modified-Since: si el
+    servidor responde 304 se devuelve el DataFrame guardado sin volver a
+    descargar ni parsear.
+
+    Contadores en self.stats:
+    - hit: servido sin petición (entrada más reciente que max_age segundos).
+    - miss: descarga completa (200) y parseo.
+    - not_modified: el servidor respondió 304 y se sirvió lo guardado.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_age: float = 0) -> None:
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.expanduser("~"), ".cache", "apis", "http")
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        self.stats = {"hit": 0, "miss": 0, "not_modified": 0}
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None) -> str:
+        accept = (headers or {}).get("Accept", "")
+        items = sorted((str(k), str(v)) for k, v in (params or {}).items())
+        raw = json.dumps([url, items, accept], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{ext}")
+
+    def _write(self, path: str, data: bytes) -> None:
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _load_meta(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key, "json")
+        if not (os.path.exists(path) and os.path.exists(self._path(key, "pkl"))):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _load_frame(self, key: str) -> pd.DataFrame:
+        frame = self._frames.get(key)
+        if frame is None:
+            with open(self._path(key, "pkl"), "rb") as f:
+                frame = pickle.load(f)
+            self._frames[key] = frame
+        return frame
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def get_frame(
+        self,
+        url: str,
+        parse: Callable[[bytes], pd.DataFrame],
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        provider: str = "default",
+    ) -> pd.DataFrame:
+        """
+        GET condicional de url; parse convierte el cuerpo (bytes) en
+        DataFrame solo cuando hay contenido nuevo. Devuelve una copia.
+        """
+        key = self.key(url, params, headers)
+        meta = self._load_meta(key)
+
+        if meta is not None and self.max_age > 0 and time.time() - meta["stored"] <= self.max_age:
+            self._count("hit")
+            return self._load_frame(key).copy()
+
+        req_headers = dict(headers or {})
+        if meta is not None:
+            if meta.get("etag"):
+                req_headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                req_headers["If-Modified-Since"] = meta["last_modified"]
+
+        resp = http_get(provider, url, params=params, headers=req_headers, timeout=timeout, cache=False)
+        if resp.status_code == 304 and meta is not None:
+            self._count("not_modified")
+            meta["stored"] = time.time()
+            self._write(self._path(key, "json"), json.dumps(meta).encode("utf-8"))
+            return self._load_frame(key).copy()
+        resp.raise_for_status()
+
+        frame = parse(resp.content)
+        self._count("miss")
+        self._write(self._path(key, "body"), resp.content)
+        self._write(self._path(key, "pkl"), pickle.dumps(frame, protocol=pickle.HIGHEST_PROTOCOL))
+        meta = {
+            "url": resp.url,
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "stored": time.time(),
+        }
+        self._write(self._path(key, "json"), json.dumps(meta).encode("utf-8"))
+        self._frames[key] = frame
+        return frame.copy()
+
+    def body(self, url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None) -> Optional[bytes]:
+        """Cuerpo guardado de una petición (None si no está en caché)."""
+        path = self._path(self.key(url, params, headers), "body")
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def clear(self) -> None:
+        self._frames.clear()
+        for name in os.listdir(self.cache_dir):
+            if name.rsplit(".", 1)[-1] in ("json", "body", "pkl", "tmp"):
+                os.remove(os.path.join(self.cache_dir, name))
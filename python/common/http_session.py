@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import inspect
+import threading
+import weakref
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Timeout (segundos) por defecto de cada fuente
+PROVIDER_TIMEOUTS: Dict[str, float] = {
+    "comext": 120,
+    "ecb": 120,
+    "eurostat": 180,
+    "fred": 120,
+    "imf": 180,
+    "ine": 60,
+    "oecd": 180,
+    "ourworldindata": 120,
+    "worldbank": 120,
+    "default": 120,
+}
+
+# Configuración de reintentos de la sesión compartida (ver configure_session)
+RETRY_SETTINGS: Dict[str, Any] = {
+    "total": 3,
+    "backoff_factor": 0.5,
+    "backoff_jitter": 0.5,
+    "backoff_max": 60,
+    "status_forcelist": (429, 500, 502, 503, 504),
+    "pool_maxsize": 16,
+}
+
+# Máximo de peticiones HTTP simultáneas por host, sumando todos los hilos
+# y funciones del proceso (el resto espera su turno)
+HOST_LIMITS: Dict[str, int] = {
+    "sdmx.oecd.org": 2,
+    "api.imf.org": 2,
+}
+DEFAULT_HOST_LIMIT = 4
+
+# Argumentos que admite Retry en la versión instalada de urllib3 (backoff_jitter
+# y backoff_max solo existen desde urllib3 2; allowed_methods desde 1.26)
+_RETRY_ARGS = set(inspect.signature(Retry.__init__).parameters)
+
+_sessions: Dict[bool, requests.Session] = {}
+_lock = threading.Lock()
+_host_slots: Dict[str, threading.BoundedSemaphore] = {}
+
+# Caché de respuestas activa (ver response_cache.enable_response_cache)
+_response_cache: Any = None
+
+
+def make_session(retry: bool = True, **settings: Any) -> requests.Session:
+    """
+    Sesión requests con pool de conexiones por host (keep-alive) y, si
+    retry=True, reintentos con backoff exponencial y jitter ante errores de
+    conexión y respuestas 429/5xx, solo en GET/HEAD y respetando
+    Retry-After.
+    """
+    cfg = {**RETRY_SETTINGS, **settings}
+    retries: Any = 0
+    if retry:
+        kwargs: Dict[str, Any] = {
+            "total": cfg["total"],
+            "backoff_factor": cfg["backoff_factor"],
+            "backoff_jitter": cfg["backoff_jitter"],
+            "backoff_max": cfg["backoff_max"],
+            "status_forcelist": cfg["status_forcelist"],
+            "allowed_methods": frozenset({"GET", "HEAD"}),
+            "respect_retry_after_header": True,
+            "raise_on_status": False,
+        }
+        if "allowed_methods" not in _RETRY_ARGS:
+            kwargs["method_whitelist"] = kwargs.pop("allowed_methods")
+        # Con urllib3 1.x: sin jitter y con el tope de espera fijo de Retry (120 s)
+        retries = Retry(**{k: v for k, v in kwargs.items() if k in _RETRY_ARGS})
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=cfg["pool_maxsize"], max_retries=retries)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(retry: bool = True) -> requests.Session:
+    """Sesión compartida por todos los módulos (una con reintentos y otra sin ellos)."""
+    with _lock:
+        session = _sessions.get(retry)
+        if session is None:
+            session = _sessions[retry] = make_session(retry)
+        return session
+
+
+def configure_session(**settings: Any) -> None:
+    """
+    Cambiar la configuración de la sesión compartida (total, backoff_factor,
+    backoff_jitter, backoff_max, status_forcelist, pool_maxsize). Las
+    sesiones actuales se cierran y se crean de nuevo al usarse.
+    """
+    with _lock:
+        RETRY_SETTINGS.update(settings)
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def host_slot(host: str) -> threading.BoundedSemaphore:
+    """Semáforo compartido del host (límite en HOST_LIMITS o DEFAULT_HOST_LIMIT)."""
+    with _lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = _host_slots[host] = threading.BoundedSemaphore(max(1, HOST_LIMITS.get(host, DEFAULT_HOST_LIMIT)))
+        return slot
+
+
+def set_host_limit(host: str, limit: int) -> None:
+    """Cambiar el máximo de peticiones simultáneas a host (peticiones nuevas)."""
+    with _lock:
+        HOST_LIMITS[host] = limit
+        _host_slots.pop(host, None)
+
+
+def _limited(url: str, send: Callable[[], requests.Response], stream: bool = False) -> requests.Response:
+    # Ocupa un hueco del host mientras dura la petición. Con stream=True el
+    # cuerpo aún no se ha leído: el hueco se libera al cerrar la respuesta
+    # (o cuando se libera de memoria, si nunca se cierra). Una respuesta de
+    # error (>= 400) se lee y se cierra ya, aunque sea en streaming: la
+    # excepción de raise_for_status() la mantiene viva y el hueco no
+    # volvería a quedar libre
+    slot = host_slot(urlsplit(url).netloc)
+    slot.acquire()
+    try:
+        resp = send()
+    except BaseException:
+        slot.release()
+        raise
+    if not stream or resp.status_code >= 400:
+        try:
+            if stream:
+                with resp:
+                    resp.content
+        finally:
+            slot.release()
+        return resp
+
+    released = threading.Event()
+
+    def release() -> None:
+        if not released.is_set():
+            released.set()
+            slot.release()
+
+    ref = weakref.ref(resp)
+
+    def close() -> None:
+        target = ref()
+        try:
+            if target is not None:
+                requests.Response.close(target)
+        finally:
+            release()
+
+    resp.close = close  # type: ignore[method-assign]
+    weakref.finalize(resp, release)
+    return resp
+
+
+def set_response_cache(cache: Any) -> None:
+    """Activar (o con None desactivar) una caché de respuestas para http_get."""
+    global _response_cache
+    _response_cache = cache
+
+
+def http_get(
+    provider: str,
+    url: str,
+    params: Any = None,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None,
+    stream: bool = False,
+    retry: bool = True,
+    cache: bool = True,
+) -> requests.Response:
+    """
+    GET a través de la sesión compartida con el timeout por defecto de la
+    fuente (PROVIDER_TIMEOUTS). retry=False usa la sesión sin reintentos
+    (p. ej. cuando el llamador gestiona sus propios reintentos). Como mucho
+    HOST_LIMITS peticiones simultáneas por host en todo el proceso.
+
+    Si hay una caché de respuestas activa, las peticiones no condicionales
+    se sirven desde ella cuando están vigentes; cache=False la omite (p. ej.
+    descargas a fichero con su propia detección de cambios). Con
+    stream=True el cuerpo se guarda en disco según llega y se lee desde
+    allí, sin cargarlo entero en memoria.
+    """
+    if timeout is None:
+        timeout = PROVIDER_TIMEOUTS.get(provider, PROVIDER_TIMEOUTS["default"])
+    store = _response_cache if cache else None
+    if store is not None and not any(h.lower().startswith("if-") for h in (headers or {})):
+        cached = store.get(provider, url, params, headers, stream=stream)
+        if cached is not None:
+            return cached
+        resp = _limited(
+            url,
+            lambda: get_session(retry).get(url, params=params, headers=headers, timeout=timeout, stream=stream),
+            stream=stream,
+        )
+        return store.put(provider, url, resp, params, headers, stream=stream)
+    return _limited(
+        url,
+        lambda: get_session(retry).get(url, params=params, headers=headers, timeout=timeout, stream=stream),
+        stream=stream,
+    )
+
+
+def http_head(
+    provider: str,
+    url: str,
+    params: Any = None,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None,
+) -> requests.Response:
+    """HEAD a través de la sesión compartida (sigue redirecciones)."""
+    if timeout is None:
+        timeout = PROVIDER_TIMEOUTS.get(provider, PROVIDER_TIMEOUTS["default"])
+    return _limited(
+        url, lambda: get_session().head(url, params=params, headers=headers, timeout=timeout, allow_redirects=True)
+    )
@@ -0,0 +1,74 @@
+# Benchmark de la sesión HTTP compartida
+# ----------------------------------------------------------------------------
+# Objetivo
+#   Compara requests.get (una conexión nueva por petición) frente a http_get
+#   (sesión compartida con keep-alive) contra un servidor HTTP/1.1 local:
+#   tiempo total y número de conexiones TCP abiertas.
+#   Uso: python http_session_benchmark.py [--requests 200] [--workers 1]
+#   Nota: el servidor local es HTTP sin TLS; contra APIs reales (HTTPS) la
+#   diferencia es mayor porque cada conexión nueva repite el handshake TLS.
+# ----------------------------------------------------------------------------
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from http_session import http_get
+
+BODY = b"TIME_PERIOD,OBS_VALUE\n" + b"".join(b"2020-%02d,%d.5\n" % (m, m) for m in range(1, 13))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self) -> None:
+        super().setup()
+        with _Handler.lock:
+            _Handler.connections += 1
+
+    def do_GET(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def timed(label: str, get, url: str, n: int, workers: int) -> None:
+    _Handler.connections = 0
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        statuses = list(pool.map(lambda _: get(url).status_code, range(n)))
+    elapsed = time.perf_counter() - t0
+    assert all(s == 200 for s in statuses)
+    print(f"{label:<32} {elapsed * 1000:>8.1f} ms {n / elapsed:>8.0f} req/s {_Handler.connections:>6} conexiones")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/data.csv"
+
+    print(f"{args.requests} peticiones GET, {args.workers} hilo(s)")
+    timed("requests.get (sin sesión)", lambda u: requests.get(u, timeout=10), url, args.requests, args.workers)
+    timed("http_get (sesión compartida)", lambda u: http_get("default", u), url, args.requests, args.workers)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import re
+import threading
+from datetime import date
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from sdmx_csv import SDMX_TIME_COLUMN, sdmx_column_id
+
+# Formatos de periodo SDMX -> frecuencia
+_PERIOD_FORMATS = [
+    (re.compile(r"^(\d{4})$"), "A"),
+    (re.compile(r"^(\d{4})-S([12])$"), "S"),
+    (re.compile(r"^(\d{4})-Q([1-4])$"), "Q"),
+    (re.compile(r"^(\d{4})-(\d{2})$"), "M"),
+    (re.compile(r"^(\d{4})-W(\d{2})$"), "W"),
+    (re.compile(r"^(\d{4})-(\d{2})-(\d{2})$"), "D"),
+]
+# Límites de una ventana abierta (días desde 1970-01-01)
+_MIN_DAY = -(10**6)
+_MAX_DAY = 10**6
+
+Range = Tuple[int, int]
+
+
+def _day(y: int, m: int, d: int) -> int:
+    return (date(y, m, d) - date(1970, 1, 1)).days
+
+
+def _month_bounds(y: int, m: int, months: int) -> Range:
+    first = _day(y, m, 1)
+    ny, nm = (y + (m - 1 + months) // 12, (m - 1 + months) % 12 + 1)
+    return first, _day(ny, nm, 1) - 1
+
+
+def period_bounds(period: str) -> Optional[Tuple[int, int, str]]:
+    """
+    Primer y último día (ordinal desde 1970-01-01) y frecuencia de un
+    periodo SDMX ("2020", "2020-S1", "2020-Q3", "2020-07", "2020-W05",
+    "2020-07-15"). None si el formato no se reconoce.
+    """
+    text = str(period).strip()
+    for pattern, freq in _PERIOD_FORMATS:
+        m = pattern.match(text)
+        if m is None:
+            continue
+        y = int(m.group(1))
+        if freq == "A":
+            return (*_month_bounds(y, 1, 12), freq)
+        if freq == "S":
+            return (*_month_bounds(y, 6 * int(m.group(2)) - 5, 6), freq)
+        if freq == "Q":
+            return (*_month_bounds(y, 3 * int(m.group(2)) - 2, 3), freq)
+        if freq == "M":
+            return (*_month_bounds(y, int(m.group(2)), 1), freq)
+        if freq == "W":
+            first = (date.fromisocalendar(y, int(m.group(2)), 1) - date(1970, 1, 1)).days
+            return first, first + 6, freq
+        day = _day(y, int(m.group(2)), int(m.group(3)))
+        return day, day, freq
+    return None
+
+
+def format_period(day: int, freq: str) -> str:
+    """Periodo SDMX de frecuencia freq que contiene el día ordinal 'day'."""
+    d = date.fromordinal(date(1970, 1, 1).toordinal() + day)
+    if freq == "A":
+        return f"{d.year}"
+    if freq == "S":
+        return f"{d.year}-S{1 if d.month <= 6 else 2}"
+    if freq == "Q":
+        return f"{d.year}-Q{(d.month - 1) // 3 + 1}"
+    if freq == "M":
+        return f"{d.year}-{d.month:02d}"
+    if freq == "W":
+        iso = d.isocalendar()
+        return f"{iso[0]}-W{iso[1]:02d}"
+    return d.isoformat()
+
+
+def _period_start_back(day: int, freq: str, n: int) -> int:
+    # Primer día del periodo n-1 periodos antes del que contiene 'day'
+    for _ in range(max(0, n - 1)):
+        first, _, _ = period_bounds(format_period(day, freq))
+        day = first - 1
+    return period_bounds(format_period(day, freq))[0]
+
+
+def _merge_ranges(ranges: List[Range]) -> List[Range]:
+    merged: List[Range] = []
+    for lo, hi in sorted(ranges):
+        if merged and lo <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+        else:
+            merged.append((lo, hi))
+    return merged
+
+
+def _subtract(window: Range, covered: List[Range]) -> List[Range]:
+    missing: List[Range] = []
+    lo, hi = window
+    for c_lo, c_hi in covered:
+        if c_hi < lo or c_lo > hi:
+            continue
+        if c_lo > lo:
+            missing.append((lo, c_lo - 1))
+        lo = max(lo, c_hi + 1)
+        if lo > hi:
+            break
+    if lo <= hi:
+        missing.append((lo, hi))
+    return missing
+
+
+def _time_column(df: pd.DataFrame) -> Optional[str]:
+    return next((c for c in df.columns if sdmx_column_id(c) == SDMX_TIME_COLUMN), None)
+
+
+def _row_bounds(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    # Primer y último día de cada fila, calculados una vez por periodo distinto
+    col = _time_column(df)
+    if col is None or df.empty:
+        return np.full(len(df), _MIN_DAY), np.full(len(df), _MAX_DAY)
+    codes, uniques = pd.factorize(df[col].astype(str))
+    bounds = [period_bounds(u) or (_MIN_DAY, _MAX_DAY, "") for u in uniques]
+    first = np.array([b[0] for b in bounds], dtype=np.int64)
+    last = np.array([b[1] for b in bounds], dtype=np.int64)
+    return first[codes], last[codes]
+
+
+class PeriodRangeCache:
+    """
+    Caché por dataflow+clave que recuerda qué rangos de periodos tiene.
+
+    get_frame(key, fetch, start, end) devuelve los datos de la ventana
+    [start, end]. Solo se llama a fetch(startPeriod, endPeriod) para los
+    subrangos que faltan, más los últimos revision_tail periodos de la
+    ventana (para recoger revisiones); el resto se sirve de la caché. Cada
+    rango descargado solo se da por cubierto hasta el último periodo
+    recibido (con end o sin él), así que los posteriores, aún sin publicar,
+    se vuelven a pedir en las siguientes llamadas.
+
+    Contadores en self.stats: hit (sin peticiones), partial (solo
+    subrangos), miss (entrada nueva) y fetches (llamadas a fetch).
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, revision_tail: int = 0) -> None:
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.expanduser("~"), ".cache", "apis", "periods")
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.revision_tail = revision_tail
+        self.stats = {"hit": 0, "partial": 0, "miss": 0, "fetches": 0}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        # Un cerrojo por clave: descargas de claves distintas van en paralelo
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json"), os.path.join(self.cache_dir, f"{digest}.pkl")
+
+    def _load(self, key: str) -> Tuple[List[Range], Optional[pd.DataFrame]]:
+        meta_path, frame_path = self._paths(key)
+        if not (os.path.exists(meta_path) and os.path.exists(frame_path)):
+            return [], None
+        with open(meta_path, "r", encoding="utf-8") as f:
+            covered = [tuple(r) for r in json.load(f)["covered"]]
+        with open(frame_path, "rb") as f:
+            return covered, pickle.load(f)
+
+    def _store(self, key: str, covered: List[Range], frame: pd.DataFrame) -> None:
+        meta_path, frame_path = self._paths(key)
+        for path, data in (
+            (frame_path, pickle.dumps(frame, protocol=pickle.HIGHEST_PROTOCOL)),
+            (meta_path, json.dumps({"key": key, "covered": covered}).encode("utf-8")),
+        ):
+            tmp = f"{path}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+
+    def covered(self, key: str) -> List[Tuple[str, str]]:
+        """Rangos guardados para key, como (primer día, último día) ISO."""
+        return [
+            (format_period(lo, "D") if lo > _MIN_DAY else "", format_period(hi, "D") if hi < _MAX_DAY else "")
+            for lo, hi in self._load(key)[0]
+        ]
+
+    def get_frame(
+        self,
+        key: str,
+        fetch: Callable[[Optional[str], Optional[str]], pd.DataFrame],
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> pd.DataFrame:
+        start_b = period_bounds(start) if start else None
+        end_b = period_bounds(end) if end else None
+        if (start and start_b is None) or (end and end_b is None):
+            raise ValueError(f"Formato de periodo no reconocido: {start!r} / {end!r}")
+        freq = (start_b or end_b or (0, 0, "M"))[2]
+        lo = start_b[0] if start_b else _MIN_DAY
+        hi = end_b[1] if end_b else _MAX_DAY
+
+        with self._key_lock(key):
+            covered, cached = self._load(key)
+            missing = _subtract((lo, hi), covered)
+
+            if self.revision_tail > 0 and covered:
+                # Últimos periodos ya guardados de la ventana: se vuelven a pedir
+                last_known = min(hi, max(c_hi for _, c_hi in covered))
+                if last_known >= lo:
+                    tail_lo = max(lo, _period_start_back(last_known, freq, self.revision_tail))
+                    missing = _merge_ranges(missing + [(tail_lo, last_known)])
+            self._count("miss" if cached is None else "partial" if missing else "hit")
+
+            base = cached if cached is not None else pd.DataFrame()
+            parts: List[pd.DataFrame] = []
+            for r_lo, r_hi in missing:
+                part = fetch(
+                    format_period(r_lo, freq) if r_lo > _MIN_DAY else None,
+                    format_period(r_hi, freq) if r_hi < _MAX_DAY else None,
+                )
+                self._count("fetches")
+                if not base.empty:
+                    # Lo descargado sustituye a lo guardado en ese rango
+                    first, last = _row_bounds(base)
+                    base = base[(last < r_lo) | (first > r_hi)]
+                # Un rango solo se da por cubierto hasta el último dato recibido:
+                # los periodos posteriores (aún sin publicar) se vuelven a pedir
+                if not part.empty:
+                    parts.append(part)
+                    r_hi = min(r_hi, int(_row_bounds(part)[1].max()))
+                    covered = _merge_ranges(covered + [(r_lo, r_hi)])
+
+            frames = [base] + parts
+            frames = [f for f in frames if not f.empty]
+            merged = pd.concat(frames, ignore_index=True) if len(frames) > 1 else (frames[0] if frames else pd.DataFrame())
+            for col in merged.columns:
+                if merged[col].dtype == object and any(isinstance(f[col].dtype, pd.CategoricalDtype) for f in frames if col in f):
+                    merged[col] = merged[col].astype("category")
+            time_col = _time_column(merged)
+            if time_col is not None:
+                merged = merged.sort_values(time_col, kind="stable").reset_index(drop=True)
+            if missing:
+                self._store(key, covered, merged)
+
+        if merged.empty:
+            return merged.copy()
+        first, last = _row_bounds(merged)
+        return merged[(first <= hi) & (last >= lo)].reset_index(drop=True)
@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import IO, Any, Dict, List, Optional, Tuple, Union
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.response import HTTPResponse
+
+from http_session import set_response_cache
+
+# Tiempo de vida (segundos) de las respuestas guardadas de cada fuente
+DEFAULT_TTLS: Dict[str, float] = {
+    "ecb": 6 * 3600,
+    "fred": 6 * 3600,
+    "default": 24 * 3600,
+}
+
+# Cabeceras que cambian el contenido de la respuesta (parte de la clave)
+KEY_HEADERS = ("Accept", "Accept-Language")
+
+# Cabeceras que no se guardan: el cuerpo se guarda ya descomprimido
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    stored REAL NOT NULL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+CREATE INDEX IF NOT EXISTS responses_provider ON responses (provider);
+"""
+
+
+def _param_pairs(params: Any) -> List[Tuple[str, str]]:
+    # dict (con valores escalares o listas) o lista de tuplas -> pares ordenados
+    if not params:
+        return []
+    items = params.items() if isinstance(params, dict) else params
+    pairs: List[Tuple[str, str]] = []
+    for k, v in items:
+        if isinstance(v, (list, tuple)):
+            pairs.extend((str(k), str(x)) for x in v)
+        elif v is not None:
+            pairs.append((str(k), str(v)))
+    return sorted(pairs)
+
+
+class ResponseCache:
+    """
+    Caché persistente de respuestas HTTP compartida por todas las fuentes.
+
+    La clave es la petición normalizada (URL, parámetros ordenados y las
+    cabeceras de KEY_HEADERS). Cada cuerpo se guarda comprimido con gzip en
+    cache_dir/bodies y un índice SQLite (modo WAL) registra fuente, fecha de
+    guardado, último acceso y tamaño, de modo que varios procesos pueden
+    usar la misma carpeta a la vez.
+
+    - ttl: segundos de vida, un número para todas las fuentes o un dict
+      fuente -> segundos (las que falten usan DEFAULT_TTLS). 0 desactiva la
+      caché para esa fuente.
+    - max_bytes: tamaño máximo en disco; al superarlo se borran las
+      entradas usadas hace más tiempo (LRU).
+
+    Las respuestas devueltas llevan resp.from_cache (True si se sirvieron
+    de disco) y resp.wire_bytes (bytes recibidos por la red en esta
+    llamada: 0 en un acierto). Con stream=True el cuerpo se escribe en disco
+    según llega y se reproduce desde el fichero, sin tenerlo entero en
+    memoria.
+
+    Contadores en self.stats: hit, miss, expired, stored y evicted.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_bytes: int = 2 * 1024**3,
+        ttl: Union[float, Dict[str, float], None] = None,
+    ) -> None:
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.expanduser("~"), ".cache", "apis", "responses")
+        os.makedirs(os.path.join(cache_dir, "bodies"), exist_ok=True)
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        if isinstance(ttl, (int, float)):
+            self.ttls: Dict[str, float] = {"default": float(ttl)}
+        else:
+            self.ttls = {**DEFAULT_TTLS, **(ttl or {})}
+        self.stats = {"hit": 0, "miss": 0, "expired": 0, "stored": 0, "evicted": 0}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        with self._db() as db:
+            db.executescript(_SCHEMA)
+
+    def _db(self) -> sqlite3.Connection:
+        # Una conexión por hilo; WAL permite lectores y un escritor a la vez
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(os.path.join(self.cache_dir, "index.sqlite"), timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[name] += n
+
+    def _body_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, "bodies", f"{key}.gz")
+
+    def ttl(self, provider: str) -> float:
+        return self.ttls.get(provider, self.ttls.get("default", DEFAULT_TTLS["default"]))
+
+    @staticmethod
+    def key(url: str, params: Any = None, headers: Optional[Dict[str, str]] = None) -> str:
+        hdrs = CaseInsensitiveDict(headers or {})
+        raw = json.dumps([url, _param_pairs(params), [hdrs.get(h, "") for h in KEY_HEADERS]], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(
+        self,
+        provider: str,
+        url: str,
+        params: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        stream: bool = False,
+    ) -> Optional[requests.Response]:
+        """
+        Respuesta guardada y vigente para la petición, o None. Con
+        stream=True el cuerpo se lee del fichero a medida que se consume.
+        """
+        ttl = self.ttl(provider)
+        if ttl <= 0:
+            return None
+        key = self.key(url, params, headers)
+        with self._db() as db:
+            row = db.execute("SELECT url, status, headers, stored FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self._count("miss")
+            return None
+        if time.time() - row[3] > ttl:
+            self._count("expired")
+            return None
+        try:
+            if stream:
+                body: Union[bytes, IO[bytes]] = gzip.open(self._body_path(key), "rb")
+            else:
+                with open(self._body_path(key), "rb") as f:
+                    body = gzip.decompress(f.read())
+        except (OSError, EOFError):
+            # Borrada por otro proceso (desalojo) o incompleta
+            self._count("miss")
+            return None
+        with self._db() as db:
+            db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+        self._count("hit")
+        return _replay(row[0], row[1], json.loads(row[2]), body, from_cache=True)
+
+    def put(
+        self,
+        provider: str,
+        url: str,
+        resp: requests.Response,
+        params: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        stream: bool = False,
+        chunk_size: int = 1 << 20,
+    ) -> requests.Response:
+        """
+        Guardar una respuesta 200 y devolverla como respuesta reproducible
+        (igual que en un acierto posterior). Con stream=True resp se pidió
+        en streaming: el cuerpo se descomprime y se escribe en disco por
+        bloques de chunk_size bytes y la respuesta devuelta lo lee del
+        fichero.
+        """
+        if resp.status_code != 200:
+            if stream:
+                # No se guarda: se lee y se cierra para liberar la conexión
+                with resp:
+                    resp.content
+            return resp
+        if self.ttl(provider) <= 0:
+            return resp
+        kept = {k: v for k, v in resp.headers.items() if k.lower() not in _DROP_HEADERS}
+        key = self.key(url, params, headers)
+        path = self._body_path(key)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with resp, gzip.open(tmp, "wb", compresslevel=6) as f:
+                if stream:
+                    for chunk in resp.raw.stream(chunk_size, decode_content=True):
+                        f.write(chunk)
+                    body: Union[bytes, IO[bytes]] = b""
+                else:
+                    body = resp.content
+                    f.write(body)
+                wire_bytes = resp.raw.tell() if resp.raw is not None else len(body)
+            size = os.path.getsize(tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        now = time.time()
+        with self._db() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, provider, url, status, headers, stored, accessed, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, provider, url, resp.status_code, json.dumps(kept), now, now, size),
+            )
+        self._count("stored")
+        if stream:
+            # Abierto antes de desalojar: sigue legible aunque se borre ya
+            body = gzip.open(path, "rb")
+        self._evict()
+        replayed = _replay(url, resp.status_code, kept, body)
+        replayed.wire_bytes = wire_bytes  # type: ignore[attr-defined]
+        return replayed
+
+    def _evict(self) -> None:
+        # Borrar las entradas menos usadas hasta quedar por debajo de max_bytes
+        with self._db() as db:
+            total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            victims = []
+            for key, size in db.execute("SELECT key, size FROM responses ORDER BY accessed"):
+                if total <= self.max_bytes:
+                    break
+                victims.append(key)
+                total -= size
+            db.executemany("DELETE FROM responses WHERE key = ?", [(k,) for k in victims])
+        self._remove_bodies(victims)
+        self._count("evicted", len(victims))
+
+    def _remove_bodies(self, keys: List[str]) -> None:
+        for key in keys:
+            try:
+                os.remove(self._body_path(key))
+            except FileNotFoundError:
+                pass
+
+    def invalidate(
+        self,
+        provider: Optional[str] = None,
+        url_prefix: Optional[str] = None,
+        older_than: Optional[float] = None,
+    ) -> int:
+        """
+        Borrar entradas: todas, las de una fuente, las cuya URL empieza por
+        url_prefix y/o las guardadas hace más de older_than segundos.
+        Retorna el número de entradas borradas.
+        """
+        where, args = [], []
+        if provider is not None:
+            where.append("provider = ?")
+            args.append(provider)
+        if url_prefix is not None:
+            where.append("substr(url, 1, ?) = ?")
+            args.extend([len(url_prefix), url_prefix])
+        if older_than is not None:
+            where.append("stored < ?")
+            args.append(time.time() - older_than)
+        cond = f" WHERE {' AND '.join(where)}" if where else ""
+        with self._db() as db:
+            keys = [r[0] for r in db.execute(f"SELECT key FROM responses{cond}", args)]
+            db.executemany("DELETE FROM responses WHERE key = ?", [(k,) for k in keys])
+        self._remove_bodies(keys)
+        return len(keys)
+
+    def clear(self) -> int:
+        return self.invalidate()
+
+    def info(self) -> Dict[str, Any]:
+        """Entradas y bytes en disco (total y por fuente) y contadores."""
+        with self._db() as db:
+            rows = db.execute("SELECT provider, COUNT(*), SUM(size) FROM responses GROUP BY provider").fetchall()
+        return {
+            "entries": sum(r[1] for r in rows),
+            "bytes": sum(r[2] for r in rows),
+            "max_bytes": self.max_bytes,
+            "providers": {r[0]: {"entries": r[1], "bytes": r[2]} for r in rows},
+            "stats": dict(self.stats),
+        }
+
+
+def _replay(
+    url: str,
+    status: int,
+    headers: Dict[str, str],
+    body: Union[bytes, IO[bytes]],
+    from_cache: bool = False,
+) -> requests.Response:
+    # Respuesta requests construida desde lo guardado: admite .content,
+    # .json(), .text, iter_content() y lectura en streaming de .raw. Si body
+    # es un fichero abierto, el cuerpo se lee de él al consumirlo
+    resp = requests.Response()
+    resp.status_code = status
+    resp.url = url
+    resp.reason = "OK" if status == 200 else ""
+    resp.headers = CaseInsensitiveDict(headers)
+    resp.encoding = get_encoding_from_headers(resp.headers)
+    if isinstance(body, bytes):
+        resp._content = body
+        resp._content_consumed = True
+        body = io.BytesIO(body)
+    resp.raw = HTTPResponse(body=body, headers=headers, status=status, preload_content=False)
+    resp.from_cache = from_cache  # type: ignore[attr-defined]
+    resp.wire_bytes = 0  # type: ignore[attr-defined]
+    return resp
+
+
+def enable_response_cache(
+    cache_dir: Optional[str] = None,
+    max_bytes: int = 2 * 1024**3,
+    ttl: Union[float, Dict[str, float], None] = None,
+) -> ResponseCache:
+    """
+    Activar la caché de respuestas para todas las peticiones GET de todas
+    las fuentes (http_get). Retorna la caché para consultar stats/info o
+    invalidar entradas.
+    """
+    cache = ResponseCache(cache_dir=cache_dir, max_bytes=max_bytes, ttl=ttl)
+    set_response_cache(cache)
+    return cache
+
+
+def disable_response_cache() -> None:
+    set_response_cache(None)
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import csv
+import io
+from typing import Any, Dict, List, Optional, Union
+
+import pandas as pd
+
+# Columnas de estructura que preceden a las dimensiones en SDMX-CSV
+# (1.0: DATAFLOW; 2.0: STRUCTURE, STRUCTURE_ID, STRUCTURE_NAME, ACTION; BCE: KEY)
+SDMX_STRUCTURE_COLUMNS = ("DATAFLOW", "STRUCTURE", "STRUCTURE_ID", "STRUCTURE_NAME", "ACTION", "KEY")
+SDMX_TIME_COLUMN = "TIME_PERIOD"
+SDMX_VALUE_COLUMN = "OBS_VALUE"
+
+Source = Union[str, bytes, io.IOBase]
+
+
+def sdmx_column_id(column: str) -> str:
+    """Id de una columna SDMX-CSV ("geo:Geopolitical entity" -> "geo")."""
+    return str(column).split(":", 1)[0]
+
+
+def sdmx_dimension_columns(columns: List[str]) -> List[str]:
+    """
+    Columnas de dimensión en orden de la clave: las que van entre las
+    columnas de estructura y TIME_PERIOD.
+    """
+    dims: List[str] = []
+    for col in columns:
+        cid = sdmx_column_id(col)
+        if cid == SDMX_TIME_COLUMN or cid == SDMX_VALUE_COLUMN:
+            break
+        if cid not in SDMX_STRUCTURE_COLUMNS:
+            dims.append(col)
+    return dims
+
+
+def _binary_stream(source: Source, encoding: str) -> io.IOBase:
+    if isinstance(source, bytes):
+        return io.BytesIO(source)
+    if isinstance(source, str):
+        return io.BytesIO(source.encode(encoding))
+    if isinstance(source, io.TextIOBase):
+        # Flujo de texto: se pasa a bytes para que ambos motores lo acepten
+        return io.BytesIO(source.read().encode(encoding))
+    return source
+
+
+def _read_pyarrow(
+    stream: io.IOBase,
+    columns: List[str],
+    code_cols: List[str],
+    time_cols: List[str],
+    categorical: bool,
+    string_storage: Optional[str],
+) -> pd.DataFrame:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    text_type = pa.dictionary(pa.int32(), pa.string()) if categorical else pa.string()
+    column_types = {c: text_type for c in code_cols}
+    column_types.update({c: pa.string() for c in time_cols})
+    table = pacsv.read_csv(
+        stream,
+        read_options=pacsv.ReadOptions(column_names=columns, use_threads=True),
+        convert_options=pacsv.ConvertOptions(column_types=column_types, strings_can_be_null=True),
+    )
+    mapper = {pa.string(): pd.StringDtype("pyarrow")}.get if string_storage == "pyarrow" else None
+    return table.to_pandas(types_mapper=mapper)
+
+
+def read_sdmx_csv(
+    source: Source,
+    categorical: bool = True,
+    string_storage: Optional[str] = None,
+    engine: str = "c",
+    encoding: str = "utf-8",
+) -> pd.DataFrame:
+    """
+    Leer un SDMX-CSV (1.0 o 2.0) con un esquema explícito.
+
+    - Estructura, dimensiones y atributos -> category (categorical=True).
+    - TIME_PERIOD -> texto (string[pyarrow] si string_storage="pyarrow").
+    - OBS_VALUE -> float64 (valores no numéricos -> NaN).
+
+    Parameters
+    ----------
+    source : str, bytes o fichero
+        Texto CSV, cuerpo de la respuesta en bytes o un flujo binario que se
+        lee sin cargarlo entero en memoria.
+    engine : str
+        "c" (por defecto) o "pyarrow" (lectura multihilo con pyarrow.csv,
+        categorías construidas como diccionarios Arrow; requiere pyarrow).
+    """
+    stream = _binary_stream(source, encoding)
+    header_line = stream.readline().decode(encoding).lstrip("\ufeff")
+    if not header_line.strip():
+        return pd.DataFrame()
+    columns = next(csv.reader([header_line]))
+
+    time_cols = [c for c in columns if sdmx_column_id(c) == SDMX_TIME_COLUMN]
+    value_cols = [c for c in columns if sdmx_column_id(c) == SDMX_VALUE_COLUMN]
+    code_cols = [c for c in columns if c not in time_cols and c not in value_cols]
+
+    if engine == "pyarrow":
+        df = _read_pyarrow(stream, columns, code_cols, time_cols, categorical, string_storage)
+    else:
+        string_dtype: Any = pd.StringDtype("pyarrow") if string_storage == "pyarrow" else str
+        dtype: Dict[str, Any] = {c: string_dtype for c in time_cols}
+        if categorical:
+            dtype.update({c: "category" for c in code_cols})
+        df = pd.read_csv(stream, header=None, names=columns, dtype=dtype, engine=engine, encoding=encoding)
+
+    for col in value_cols:
+        if df[col].dtype != "float64":
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    return df
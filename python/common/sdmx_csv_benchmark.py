@@ -0,0 +1,68 @@
+# Benchmark del lector SDMX-CSV compartido
+# ----------------------------------------------------------------------------
+# Objetivo
+#   Compara pd.read_csv con inferencia por defecto frente a read_sdmx_csv
+#   (motor C y motor pyarrow multihilo) sobre un SDMX-CSV sintético grande:
+#   tiempo de lectura y memoria del DataFrame resultante.
+#   Uso: python sdmx_csv_benchmark.py [--rows 2000000]
+# ----------------------------------------------------------------------------
+import argparse
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from sdmx_csv import read_sdmx_csv
+
+
+def synthetic_sdmx_csv(rows: int, seed: int = 0) -> bytes:
+    # Formato SDMX-CSV 2.0 similar a Eurostat (estructura, dimensiones, tiempo, valor, atributos)
+    rng = np.random.default_rng(seed)
+    geo = np.array([f"G{i:03d}" for i in range(300)])
+    item = np.array([f"B{i:02d}G" for i in range(40)])
+    df = pd.DataFrame(
+        {
+            "STRUCTURE": "dataflow",
+            "STRUCTURE_ID": "ESTAT:nama_10_a64(1.0)",
+            "freq": "A",
+            "unit": rng.choice(["CLV20_MEUR", "CP_MEUR", "PD20_EUR"], rows),
+            "na_item": rng.choice(item, rows),
+            "geo": rng.choice(geo, rows),
+            "TIME_PERIOD": rng.integers(1975, 2025, rows).astype(str),
+            "OBS_VALUE": np.round(rng.random(rows) * 1e5, 1),
+            "OBS_FLAG": rng.choice(["", "p", "e"], rows),
+        }
+    )
+    return df.to_csv(index=False).encode("utf-8")
+
+
+def timed(label: str, func) -> None:
+    t0 = time.perf_counter()
+    df = func()
+    elapsed = time.perf_counter() - t0
+    mb = df.memory_usage(deep=True).sum() / 1e6
+    print(f"{label:<32} {elapsed:>8.2f} s {mb:>10.1f} MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    data = synthetic_sdmx_csv(args.rows)
+    print(f"SDMX-CSV sintético: {args.rows} filas, {len(data) / 1e6:.1f} MB")
+
+    timed("pd.read_csv (por defecto)", lambda: pd.read_csv(io.StringIO(data.decode("utf-8"))))
+    timed("read_sdmx_csv (c)", lambda: read_sdmx_csv(data))
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("pyarrow no instalado: se omiten los motores pyarrow")
+        return
+    timed("read_sdmx_csv (pyarrow)", lambda: read_sdmx_csv(data, engine="pyarrow"))
+    timed("read_sdmx_csv (pyarrow, str arrow)", lambda: read_sdmx_csv(data, engine="pyarrow", string_storage="pyarrow"))
+
+
+if __name__ == "__main__":
+    main()
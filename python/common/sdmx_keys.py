@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+# Clave SDMX como "caja": un conjunto de valores por dimensión. Un conjunto
+# {""} es una posición comodín (p. ej. "AUS..GDP").
+Box = Tuple[FrozenSet[str], ...]
+
+
+def parse_key(key: str) -> Box:
+    """"D.JPY+USD.EUR" -> ({"D"}, {"JPY", "USD"}, {"EUR"})."""
+    return tuple(frozenset(part.split("+")) for part in key.split("."))
+
+
+def render_key(box: Box) -> str:
+    """Inversa de parse_key (valores ordenados)."""
+    return ".".join("+".join(sorted(values)) for values in box)
+
+
+def _merge_boxes(boxes: List[Box]) -> List[Box]:
+    # Une cajas (conjuntos de valores por dimensión) que coinciden en todas
+    # las dimensiones menos una; el producto cartesiano resultante es
+    # exactamente la unión de las claves, sin series no pedidas. Una posición
+    # comodín no se une con valores concretos.
+    while True:
+        best: Optional[List[Box]] = None
+        for d in range(len(boxes[0]) if boxes else 0):
+            buckets: Dict[tuple, List[Box]] = {}
+            for i, b in enumerate(boxes):
+                rest = b[:d] + b[d + 1 :]
+                buckets.setdefault(rest if "" not in b[d] else rest + (i,), []).append(b)
+            if len(buckets) == len(boxes):
+                continue
+            merged = []
+            for group in buckets.values():
+                values = frozenset().union(*(g[d] for g in group))
+                merged.append(group[0][:d] + (values,) + group[0][d + 1 :])
+            if best is None or len(merged) < len(best):
+                best = merged
+        if best is None:
+            return boxes
+        boxes = best
+
+
+def _split_box(box: Box, max_key_length: int) -> List[Box]:
+    # Parte por la dimensión con más valores, llenando cada trozo hasta
+    # max_key_length (menos consultas que partir por la mitad)
+    if len(render_key(box)) <= max_key_length:
+        return [box]
+    d = max(range(len(box)), key=lambda k: len(box[k]))
+    values = sorted(box[d])
+    if len(values) < 2:
+        raise ValueError(f"La clave supera la longitud máxima de URL: {render_key(box)}")
+    fixed = len(render_key(box)) - len("+".join(values))
+    chunks: List[List[str]] = [[]]
+    length = fixed
+    for value in values:
+        extra = len(value) + (1 if chunks[-1] else 0)
+        if chunks[-1] and length + extra > max_key_length:
+            chunks.append([])
+            length, extra = fixed, len(value)
+        chunks[-1].append(value)
+        length += extra
+    parts: List[Box] = []
+    for chunk in chunks:
+        parts.extend(_split_box(box[:d] + (frozenset(chunk),) + box[d + 1 :], max_key_length))
+    return parts
+
+
+def group_series_keys(series_keys: Iterable[str], max_key_length: int = 1800) -> List[str]:
+    """
+    Agrupar claves SDMX en el menor número (greedy) de claves con valores OR
+    ('+'), p. ej. D.USD.EUR.SP00.A + D.JPY.EUR.SP00.A -> D.JPY+USD.EUR.SP00.A,
+    partiendo las que superen max_key_length. Las claves de entrada pueden
+    contener ya valores '+' y posiciones comodín vacías.
+    """
+    by_length: Dict[int, List[Box]] = {}
+    for key in dict.fromkeys(series_keys):
+        box = parse_key(key)
+        by_length.setdefault(len(box), []).append(box)
+
+    grouped: List[str] = []
+    for boxes in by_length.values():
+        for box in _merge_boxes(boxes):
+            grouped.extend(render_key(b) for b in _split_box(box, max_key_length))
+    return grouped
@@ -2,11 +2,15 @@
 # ----------------------------------------------------------------------------
 # 1) Cargar la función
 # 2) Ejecutar la consulta indicando dataset y series_key
-# 3) Guardar el resultado como CSV
+# 3) Guardar el resultado como CSV y en el almacén columnar (Parquet)
 # ----------------------------------------------------------------------------
 import os
+import sys
 from ecb_function import ecb_api_function
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from columnar_store import save_to_store  # noqa: E402
+
 
 def main() -> None:
     # Asegurar rutas relativas coherentes
@@ -20,6 +24,7 @@ def main() -> None:
 
     # Guardar el resultado
     df.to_csv("ecb_example.csv", index=False)
+    save_to_store(df, "ecb", "BSI")
 
 
 if __name__ == "__main__":
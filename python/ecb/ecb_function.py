@@ -1,14 +1,33 @@
 from __future__ import annotations
 
-import io
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
 import pandas as pd
 import requests
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from async_fetch import make_async  # noqa: E402
+from http_session import http_get  # noqa: E402
+from sdmx_csv import read_sdmx_csv  # noqa: E402
+from sdmx_keys import group_series_keys  # noqa: E402
+
 
 def ecb_api_function(
     dataset: str,
     series_key: str,
     base_url: str = "https://data-api.ecb.europa.eu/service/data",
+    updatedAfter: Optional[str] = None,
+    startPeriod: Optional[str] = None,
+    endPeriod: Optional[str] = None,
+    lastNObservations: Optional[int] = None,
+    engine: str = "c",
+    use_response_cache: bool = True,
 ) -> pd.DataFrame:
     """
     Descargar datos del BCE (ECB Data) en CSV (csvdata) y devolver DataFrame.
@@ -21,15 +40,242 @@ def ecb_api_function(
         Clave completa de la serie (dimensiones concatenadas con '.').
     base_url : str
         Host del servicio de datos del BCE.
+    updatedAfter : str, optional
+        Solo observaciones añadidas o revisadas después de esta fecha-hora
+        (ISO 8601, p. ej. "2024-01-31T12:00:00+00:00"). Si no hay cambios se
+        devuelve un DataFrame vacío.
+    startPeriod, endPeriod : str, optional
+        Rango de periodos (p. ej., "2020-01").
+    lastNObservations : int, optional
+        Solo las últimas N observaciones de cada serie.
+    engine : str
+        Motor del lector SDMX-CSV compartido: "c" o "pyarrow" (multihilo).
+    use_response_cache : bool
+        False no usa la caché de respuestas (enable_response_cache) aunque
+        esté activa; la usa ecb_sync_function, que detecta cambios por su
+        cuenta.
     """
 
     url = f"{base_url}/{dataset}/{series_key}"
-    params = {"format": "csvdata"}
-    resp = requests.get(url, params=params, headers={"Accept": "text/csv"}, timeout=120)
+    params: Dict[str, object] = {"format": "csvdata"}
+    if updatedAfter:
+        params["updatedAfter"] = updatedAfter
+    if startPeriod:
+        params["startPeriod"] = startPeriod
+    if endPeriod:
+        params["endPeriod"] = endPeriod
+    if lastNObservations is not None:
+        params["lastNObservations"] = lastNObservations
+    resp = http_get("ecb", url, params=params, headers={"Accept": "text/csv"}, cache=use_response_cache)
+
+    # Con updatedAfter el BCE responde 304/404 (o cuerpo vacío) si no hay cambios
+    if updatedAfter and resp.status_code in (304, 404):
+        return pd.DataFrame()
     resp.raise_for_status()
+    if not resp.content.strip():
+        return pd.DataFrame()
+
+    return read_sdmx_csv(resp.content, engine=engine)
+
+
+ecb_api_function_async = make_async(ecb_api_function, host="data-api.ecb.europa.eu")
+
+
+def _store_paths(store_dir: str, dataset: str, series_key: str) -> Tuple[str, str]:
+    folder = os.path.join(store_dir, dataset)
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, f"{series_key}.csv"), os.path.join(folder, f"{series_key}.json")
+
+
+def _obs_keys(df: pd.DataFrame) -> list:
+    return [c for c in ("KEY", "TIME_PERIOD") if c in df.columns]
+
+
+def ecb_sync_function(
+    dataset: str,
+    series_key: str,
+    store_dir: Optional[str] = None,
+    lastNObservations: Optional[int] = None,
+    base_url: str = "https://data-api.ecb.europa.eu/service/data",
+) -> Tuple[pd.DataFrame, Dict[str, object]]:
+    """
+    Sincronización incremental de una serie del BCE con un almacén local.
+
+    La primera llamada descarga la historia completa y la guarda en
+    store_dir/<dataset>/<series_key>.csv. Las siguientes envían updatedAfter
+    con la fecha de la última sincronización (y lastNObservations si se
+    indica) y solo fusionan las observaciones nuevas o revisadas.
+
+    Retorna
+    -------
+    (df, report)
+        df: serie completa actualizada.
+        report: dict con 'full_download', 'received', 'new', 'revised',
+        'unchanged' y 'last_sync'.
+    """
+    if store_dir is None:
+        store_dir = os.path.join(os.path.expanduser("~"), ".cache", "apis", "ecb")
+    csv_path, meta_path = _store_paths(store_dir, dataset, series_key)
+
+    stored: Optional[pd.DataFrame] = None
+    meta: Dict[str, object] = {}
+    if os.path.exists(csv_path) and os.path.exists(meta_path):
+        with open(csv_path, "rb") as f:
+            stored = read_sdmx_csv(f)
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+    sync_time = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    full = stored is None or stored.empty or not meta.get("last_sync")
+    update = ecb_api_function(
+        dataset,
+        series_key,
+        base_url=base_url,
+        updatedAfter=None if full else str(meta["last_sync"]),
+        lastNObservations=None if full else lastNObservations,
+        # Una respuesta guardada podría ser anterior a sync_time y las
+        # revisiones intermedias no volverían a pedirse con updatedAfter
+        use_response_cache=False,
+    )
+    if "TIME_PERIOD" in update.columns:
+        update["TIME_PERIOD"] = update["TIME_PERIOD"].astype(str)
+
+    report: Dict[str, object] = {
+        "full_download": full,
+        "received": len(update),
+        "new": 0,
+        "revised": 0,
+        "unchanged": 0,
+        "last_sync": sync_time,
+    }
+
+    if full:
+        merged = update
+        report["new"] = len(update)
+    elif update.empty:
+        merged = stored
+    else:
+        keys = _obs_keys(update)
+        both = update.merge(stored[keys + ["OBS_VALUE"]], on=keys, how="left", suffixes=("", "_stored"), indicator=True)
+        known = (both["_merge"] == "both").to_numpy()
+        new_val = pd.to_numeric(both["OBS_VALUE"], errors="coerce").to_numpy(dtype=float)
+        old_val = pd.to_numeric(both["OBS_VALUE_stored"], errors="coerce").to_numpy(dtype=float)
+        same = known & ((new_val == old_val) | (np.isnan(new_val) & np.isnan(old_val)))
+        report["new"] = int((~known).sum())
+        report["revised"] = int((known & ~same).sum())
+        report["unchanged"] = int(same.sum())
+
+        replaced = stored.set_index(keys).index.isin(update.set_index(keys).index)
+        merged = pd.concat([stored[~replaced], update], ignore_index=True)
+        merged = merged.sort_values(keys, kind="stable").reset_index(drop=True)
+
+    merged.to_csv(csv_path, index=False)
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump({"dataset": dataset, "series_key": series_key, "last_sync": sync_time}, f)
+    return merged, report
+
+
+def ecb_group_series_keys(series_keys: Iterable[str], max_key_length: int = 1800) -> List[str]:
+    """
+    Agrupar claves completas en el menor número (greedy) de claves con
+    valores OR ('+'), p. ej. D.USD.EUR.SP00.A + D.JPY.EUR.SP00.A ->
+    D.JPY+USD.EUR.SP00.A, partiendo las que superen max_key_length
+    (ver sdmx_keys.group_series_keys).
+    """
+    return group_series_keys(series_keys, max_key_length=max_key_length)
+
+
+def _key_in_group(key: str, group: str) -> bool:
+    # ¿Está la clave completa incluida en la clave agrupada (valores con '+')?
+    parts, options = key.split("."), group.split(".")
+    return len(parts) == len(options) and all(p in o.split("+") for p, o in zip(parts, options))
+
+
+def ecb_batch_function(
+    dataset: str,
+    series_keys: Iterable[str],
+    max_url_length: int = 2000,
+    max_workers: int = 4,
+    base_url: str = "https://data-api.ecb.europa.eu/service/data",
+    startPeriod: Optional[str] = None,
+    endPeriod: Optional[str] = None,
+    lastNObservations: Optional[int] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Descargar muchas series de un dataset del BCE con pocas peticiones.
+
+    Las claves se agrupan en consultas OR (ver ecb_group_series_keys) que no
+    superan max_url_length, se descargan en paralelo (max_workers hilos) y el
+    CSV combinado se reparte por la columna KEY.
+
+    Retorna
+    -------
+    dict
+        series_key -> DataFrame (vacío si la serie no devolvió datos o no
+        existe; el 404 del BCE para un grupo sin datos no interrumpe el lote).
+        Si una clave concreta da error 4xx (p. ej. mal escrita), su
+        DataFrame queda vacío con el motivo en attrs["error"].
+    """
+    series_keys = list(dict.fromkeys(series_keys))
+    # Margen para el resto de la URL: base, dataset y parámetros de consulta
+    overhead = len(f"{base_url}/{dataset}/?format=csvdata") + 120
+    groups = ecb_group_series_keys(series_keys, max_key_length=max(1, max_url_length - overhead))
+    group_members = {group: [k for k in series_keys if _key_in_group(k, group)] for group in groups}
+    errors: Dict[str, str] = {}
+
+    def fetch_key(key: str) -> pd.DataFrame:
+        return ecb_api_function(
+            dataset,
+            key,
+            base_url=base_url,
+            startPeriod=startPeriod,
+            endPeriod=endPeriod,
+            lastNObservations=lastNObservations,
+        )
+
+    def client_error(exc: requests.HTTPError) -> Optional[int]:
+        status = exc.response.status_code if exc.response is not None else None
+        return status if status is not None and 400 <= status < 500 else None
+
+    def fetch(group: str) -> pd.DataFrame:
+        # El BCE responde 404 si ninguna serie del grupo tiene datos (claves
+        # inexistentes o sin observaciones en el rango): grupo vacío. Con
+        # otro error 4xx (p. ej. 400 por una clave mal formada) se piden las
+        # claves del grupo una a una para no perder las demás.
+        members = group_members.get(group) or [group]
+        try:
+            return fetch_key(group)
+        except requests.HTTPError as exc:
+            status = client_error(exc)
+            if status is None:
+                raise
+            if status == 404 or len(members) == 1:
+                if status != 404:
+                    errors.update({k: f"HTTP {status}" for k in members})
+                return pd.DataFrame()
+        frames = []
+        for key in members:
+            try:
+                frames.append(fetch_key(key))
+            except requests.HTTPError as exc:
+                status = client_error(exc)
+                if status is None:
+                    raise
+                if status != 404:
+                    errors[key] = f"HTTP {status}"
+        frames = [df for df in frames if not df.empty]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
 
-    text_stream = io.StringIO(resp.content.decode("utf-8"))
-    df = pd.read_csv(text_stream)
-    return df
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        frames = [df for df in pool.map(fetch, groups) if not df.empty]
 
+    combined = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    by_key: Dict[str, pd.DataFrame] = {}
+    if "KEY" in combined.columns:
+        by_key = {str(k): g.reset_index(drop=True) for k, g in combined.groupby("KEY", sort=False)}
 
+    prefix = f"{dataset}."
+    result = {key: by_key.get(prefix + key, pd.DataFrame(columns=combined.columns)) for key in series_keys}
+    for key, error in errors.items():
+        result[key].attrs["error"] = error
+    return result
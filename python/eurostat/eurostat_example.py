@@ -2,11 +2,16 @@
 # ----------------------------------------------------------------------------
 # 1) Cargar la función
 # 2) Ejecutar la consulta con filtros (c[dim] en R -> dict en Python)
-# 3) Guardar el resultado como CSV
+# 3) Guardar el resultado como CSV y en el almacén columnar (Parquet)
+# 4) Releer del almacén solo las columnas necesarias (sin volver a descargar)
 # ----------------------------------------------------------------------------
 import os
+import sys
 from eurostat_function import eurostat_api_function
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from columnar_store import ColumnarStore, save_to_store  # noqa: E402
+
 
 def main() -> None:
     # Asegurar rutas relativas coherentes
@@ -25,6 +30,10 @@ def main() -> None:
 
     # Guardar el resultado
     df.to_csv("eurostat_example.csv", index=False)
+    if save_to_store(df, "eurostat", "nama_10_a64") is not None:
+        # Releer del almacén (memory-map, solo las columnas pedidas)
+        serie = ColumnarStore().read("eurostat", "nama_10_a64", columns=["geo", "TIME_PERIOD", "OBS_VALUE"])
+        print(serie.tail())
 
 
 if __name__ == "__main__":
@@ -1,10 +1,216 @@
 from __future__ import annotations
 
 import io
-from typing import Dict, Iterable
+import json
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional
 
+import numpy as np
 import pandas as pd
-import requests
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from async_fetch import make_async  # noqa: E402
+from http_session import http_get  # noqa: E402
+from sdmx_csv import read_sdmx_csv, sdmx_column_id  # noqa: E402
+
+_XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+
+
+class _DecompressingReader(io.RawIOBase):
+    """
+    Lector de solo lectura sobre resp.raw que descomprime al vuelo.
+
+    Deshace primero la codificación HTTP (Content-Encoding gzip/deflate) y,
+    si el contenido resultante empieza por la firma gzip (compress="true" en
+    Eurostat), también esa capa. Cuenta los bytes recibidos por la red y el
+    tiempo dedicado a descomprimir.
+    """
+
+    def __init__(self, raw, content_encoding: str = "", chunk_size: int = 1 << 16) -> None:
+        self._raw = raw
+        self._chunk_size = chunk_size
+        encoding = (content_encoding or "").lower()
+        self._http = zlib.decompressobj(zlib.MAX_WBITS | 32) if encoding in ("gzip", "x-gzip", "deflate") else None
+        self._payload: Optional["zlib._Decompress"] = None
+        self._sniffed = False
+        self._pending = b""
+        self._offset = 0
+        self._eof = False
+        self.bytes_on_wire = 0
+        self.bytes_out = 0
+        self.decompress_seconds = 0.0
+
+    def readable(self) -> bool:
+        return True
+
+    def _inflate(self, dec, data: bytes):
+        # Soporta gzip con varios miembros concatenados
+        out = []
+        while data:
+            out.append(dec.decompress(data))
+            if dec.eof and dec.unused_data:
+                data = dec.unused_data
+                dec = zlib.decompressobj(zlib.MAX_WBITS | 32)
+            else:
+                data = b""
+        return b"".join(out), dec
+
+    def _decode(self, data: bytes, final: bool = False) -> bytes:
+        t0 = time.perf_counter()
+        if self._http is not None:
+            data, self._http = self._inflate(self._http, data)
+            if final:
+                data += self._http.flush()
+        if not self._sniffed and data:
+            self._sniffed = True
+            if data[:2] == b"\x1f\x8b":
+                self._payload = zlib.decompressobj(zlib.MAX_WBITS | 32)
+        if self._payload is not None:
+            data, self._payload = self._inflate(self._payload, data)
+            if final:
+                data += self._payload.flush()
+        self.decompress_seconds += time.perf_counter() - t0
+        return data
+
+    def readinto(self, b) -> int:
+        while self._offset >= len(self._pending) and not self._eof:
+            chunk = self._raw.read(self._chunk_size, decode_content=False)
+            if not chunk:
+                self._eof = True
+                self._pending = self._decode(b"", final=True)
+            else:
+                self.bytes_on_wire += len(chunk)
+                self._pending = self._decode(chunk)
+            self._offset = 0
+        n = min(len(b), len(self._pending) - self._offset)
+        b[:n] = memoryview(self._pending)[self._offset : self._offset + n]
+        self._offset += n
+        self.bytes_out += n
+        return n
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _element_name(el: ET.Element, lang: str) -> Optional[str]:
+    names = [c for c in el if _local_name(c.tag) == "Name"]
+    for c in names:
+        if c.get(_XML_LANG) == lang:
+            return c.text
+    return names[0].text if names else None
+
+
+def _parse_structure(xml_bytes: bytes, lang: str) -> Dict[str, Any]:
+    # Extrae de la estructura SDMX-ML 2.1 las versiones (dataflow, DSD,
+    # codelists), qué codelist usa cada componente y las etiquetas por código.
+    root = ET.fromstring(xml_bytes)
+    versions: Dict[str, Any] = {"codelists": {}}
+    codelists: Dict[str, Dict[str, str]] = {}
+    component_codelist: Dict[str, str] = {}
+    for el in root.iter():
+        tag = _local_name(el.tag)
+        if tag == "Dataflow":
+            versions["dataflow"] = el.get("version")
+        elif tag == "DataStructure":
+            versions["datastructure"] = el.get("version")
+        elif tag == "Codelist":
+            versions["codelists"][el.get("id")] = el.get("version")
+            codelists[el.get("id")] = {
+                code.get("id"): _element_name(code, lang) or code.get("id")
+                for code in el
+                if _local_name(code.tag) == "Code"
+            }
+        elif tag in ("Dimension", "Attribute", "PrimaryMeasure", "Measure"):
+            for enum in el.iter():
+                if _local_name(enum.tag) == "Enumeration":
+                    ref = next((r for r in enum if _local_name(r.tag) == "Ref"), None)
+                    if ref is not None and el.get("id"):
+                        component_codelist[el.get("id")] = ref.get("id")
+
+    labels = {comp: codelists[cl] for comp, cl in component_codelist.items() if cl in codelists}
+    return {"versions": versions, "labels": labels}
+
+
+def eurostat_codelists(
+    dataset_identifier: str,
+    agency_identifier: str = "ESTAT",
+    lang: str = "en",
+    cache_dir: Optional[str] = None,
+    max_age_days: float = 7,
+    refresh: bool = False,
+) -> Dict[str, Any]:
+    """
+    Codelists (etiquetas por código) de un dataset Eurostat con caché en disco.
+
+    La estructura se descarga una vez del endpoint SDMX de estructura y se
+    guarda en cache_dir (por defecto ~/.cache/apis/eurostat) junto con las
+    versiones del dataflow, la DSD y cada codelist. Se vuelve a descargar si
+    refresh=True o si la caché tiene más de max_age_days días.
+
+    Retorna
+    -------
+    dict
+        {"versions": {...}, "fetched": fecha ISO, "labels": {componente:
+        {código: etiqueta}}, "from_cache": True si se leyó de disco y False
+        si se acaba de descargar}
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.expanduser("~"), ".cache", "apis", "eurostat")
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{agency_identifier}_{dataset_identifier}_{lang}.json")
+
+    if not refresh and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        age = datetime.now(timezone.utc) - datetime.fromisoformat(cached["fetched"])
+        if age.total_seconds() <= max_age_days * 86400:
+            cached["from_cache"] = True
+            return cached
+
+    url = f"https://ec.europa.eu/eurostat/api/dissemination/sdmx/2.1/dataflow/{agency_identifier}/{dataset_identifier}/latest"
+    params = {"references": "descendants", "detail": "referencepartial"}
+    # Sin la caché de respuestas: esta función ya guarda su propia copia y
+    # refresh=True debe traer la estructura actual
+    resp = http_get("eurostat", url, params=params, headers={"Accept": "application/xml"}, cache=False)
+    resp.raise_for_status()
+
+    structure = _parse_structure(resp.content, lang)
+    structure["fetched"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(structure, f, ensure_ascii=False)
+    os.replace(tmp, path)
+    structure["from_cache"] = False
+    return structure
+
+
+def _attach_labels(df: pd.DataFrame, labels: Dict[str, Dict[str, str]]) -> bool:
+    # Añade <col>_label junto a cada columna con codelist. Se traducen solo
+    # las categorías (códigos distintos) y se reutilizan los códigos enteros
+    # de la columna. Devuelve False si algún código no está en la codelist.
+    complete = True
+    for col in list(df.columns):
+        mapping = labels.get(sdmx_column_id(col))
+        if mapping is None or not isinstance(df[col].dtype, pd.CategoricalDtype):
+            continue
+        cats = df[col].cat.categories
+        cat_labels = np.array([mapping.get(str(c)) for c in cats], dtype=object)
+        complete = complete and all(v is not None for v in cat_labels)
+        fcodes, uniques = pd.factorize(cat_labels)
+        codes = df[col].cat.codes.to_numpy()
+        label_codes = np.where(codes >= 0, fcodes[codes], -1)
+        label_col = pd.Categorical.from_codes(label_codes, categories=uniques)
+        if f"{col}_label" in df.columns:
+            df[f"{col}_label"] = label_col
+        else:
+            df.insert(df.columns.get_loc(col) + 1, f"{col}_label", label_col)
+    return complete
 
 
 def eurostat_api_function(
@@ -17,10 +223,26 @@ def eurostat_api_function(
     formatVersion: str = "2.0",
     lang: str = "en",
     labels: str = "name",
+    engine: str = "c",
+    resolve_labels: bool = False,
+    cache_dir: Optional[str] = None,
 ):
     """
     Descargar datos desde Eurostat SDMX 3.0 (CSV) y devolver DataFrame.
     Replica la firma de la función R correspondiente.
+
+    La respuesta se lee en streaming y se descomprime a medida que llega
+    (compress="true" y/o Content-Encoding gzip/deflate), sin mantener el
+    texto completo en memoria. Las estadísticas de transferencia quedan en
+    df.attrs["transfer"]: from_cache, bytes_on_wire, bytes_decoded,
+    decompress_seconds y total_seconds.
+
+    El CSV se lee con el lector SDMX-CSV compartido (dimensiones categóricas,
+    OBS_VALUE float64); engine="pyarrow" usa el motor multihilo.
+
+    Con resolve_labels=True se piden solo los códigos (labels="id") y las
+    etiquetas se añaden localmente como columnas categóricas <dim>_label a
+    partir de las codelists en caché (ver eurostat_codelists).
     """
     base_url = "https://ec.europa.eu/eurostat/api/dissemination/sdmx/3.0/data/dataflow"
 
@@ -38,16 +260,41 @@ def eurostat_api_function(
         format=format,
         formatVersion=formatVersion,
         lang=lang,
-        labels=labels,
+        labels="id" if resolve_labels else labels,
     )
     params = {**filters_params, **common_params}
 
-    headers = {"Accept": "application/vnd.sdmx.data+csv; version=2.0.0"}
-    resp = requests.get(url, params=params, headers=headers, timeout=180)
-    resp.raise_for_status()
+    headers = {
+        "Accept": "application/vnd.sdmx.data+csv; version=2.0.0",
+        "Accept-Encoding": "gzip, deflate",
+    }
+    t0 = time.perf_counter()
+    resp = http_get("eurostat", url, params=params, headers=headers, stream=True)
+
+    with resp:
+        resp.raise_for_status()
+        reader = _DecompressingReader(resp.raw, resp.headers.get("Content-Encoding", ""))
+        df = read_sdmx_csv(io.BufferedReader(reader, buffer_size=1 << 16), engine=engine)
+
+    # Con la caché de respuestas activa el cuerpo llega ya descomprimido
+    # desde disco: los bytes de red son los de la descarga (0 si acierto)
+    cached = hasattr(resp, "from_cache")
+    df.attrs["transfer"] = {
+        "from_cache": bool(getattr(resp, "from_cache", False)),
+        "bytes_on_wire": resp.wire_bytes if cached else reader.bytes_on_wire,
+        "bytes_decoded": reader.bytes_out,
+        "decompress_seconds": reader.decompress_seconds,
+        "total_seconds": time.perf_counter() - t0,
+    }
 
-    text_stream = io.StringIO(resp.content.decode("utf-8"))
-    df = pd.read_csv(text_stream)
+    if resolve_labels:
+        structure = eurostat_codelists(dataset_identifier, agency_identifier, lang=lang, cache_dir=cache_dir)
+        if not _attach_labels(df, structure["labels"]) and structure["from_cache"]:
+            # Códigos desconocidos: la caché puede estar desfasada
+            structure = eurostat_codelists(dataset_identifier, agency_identifier, lang=lang, cache_dir=cache_dir, refresh=True)
+            _attach_labels(df, structure["labels"])
+        df.attrs["codelist_versions"] = structure["versions"]
     return df
 
 
+eurostat_api_function_async = make_async(eurostat_api_function, host="ec.europa.eu")
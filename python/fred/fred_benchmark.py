@@ -0,0 +1,59 @@
+# Benchmark del parseo de observaciones de FRED
+# ----------------------------------------------------------------------------
+# Objetivo
+#   Compara pd.DataFrame(lista de dicts) + conversiones posteriores frente a
+#   la construcción tipada por columnas de fred_api_function (typed=True)
+#   sobre una serie diaria sintética con la forma del JSON de FRED.
+#   Uso: python fred_benchmark.py [--rows 100000]
+# ----------------------------------------------------------------------------
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from fred_function import _observations_frame
+
+
+def synthetic_observations(rows: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    dates = np.datetime_as_string(np.datetime64("1960-01-01") + np.arange(rows), unit="D")
+    values = np.round(rng.random(rows) * 100, 4).astype(str)
+    values[rng.random(rows) < 0.03] = "."
+    return [
+        {"realtime_start": "2024-05-01", "realtime_end": "2024-05-01", "date": d, "value": v}
+        for d, v in zip(dates.tolist(), values.tolist())
+    ]
+
+
+def legacy_parse(observations: list) -> pd.DataFrame:
+    df = pd.DataFrame(observations)
+    df["date"] = pd.to_datetime(df["date"])
+    df["value"] = pd.to_numeric(df["value"].replace(".", np.nan))
+    return df
+
+
+def timed(label: str, func, repeat: int = 5) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        df = func()
+        best = min(best, time.perf_counter() - t0)
+    mb = df.memory_usage(deep=True).sum() / 1e6
+    print(f"{label:<36} {best * 1000:>8.1f} ms {mb:>8.1f} MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    observations = synthetic_observations(args.rows)
+    print(f"Serie diaria sintética: {args.rows} observaciones")
+    timed("pd.DataFrame(dicts) (texto)", lambda: pd.DataFrame(observations))
+    timed("pd.DataFrame(dicts) + conversiones", lambda: legacy_parse(observations))
+    timed("columnas tipadas (typed=True)", lambda: _observations_frame(observations))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,20 +2,140 @@ from __future__ import annotations
 
 import io
 import os
-from typing import Optional
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 import requests
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from async_fetch import make_async  # noqa: E402
+from http_session import http_get  # noqa: E402
+
+# Máximo de observaciones por página de la API de FRED
+FRED_MAX_LIMIT = 100000
+
 
 def fredgraph_api_function(graph_id: str) -> pd.DataFrame:
     url = "https://fred.stlouisfed.org/graph/fredgraph.csv"
-    resp = requests.get(url, params={"g": graph_id}, headers={"Accept": "text/csv"}, timeout=120)
+    resp = http_get("fred", url, params={"g": graph_id}, headers={"Accept": "text/csv"})
     resp.raise_for_status()
     text_stream = io.StringIO(resp.content.decode("utf-8"))
     return pd.read_csv(text_stream)
 
 
+fredgraph_api_function_async = make_async(fredgraph_api_function, host="fred.stlouisfed.org")
+
+
+class FredRateLimiter:
+    """
+    Limitador token bucket (thread-safe) para la cuota de la API de FRED.
+
+    Permite rate_per_minute peticiones por minuto con ráfagas de hasta
+    'burst'. Ante un 429/5xx reduce el ritmo a la mitad y pausa (respetando
+    Retry-After); con cada respuesta correcta lo recupera poco a poco.
+    """
+
+    def __init__(self, rate_per_minute: float = 120, burst: Optional[int] = None, max_retries: int = 5) -> None:
+        self.max_rate = rate_per_minute / 60.0
+        self.rate = self.max_rate
+        self.capacity = float(burst if burst is not None else max(1, int(rate_per_minute // 12)))
+        self.max_retries = max_retries
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def penalize(self, delay: float) -> None:
+        with self._lock:
+            self.rate = max(self.max_rate / 16, self.rate / 2)
+            self._tokens = 0.0
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+
+    def reward(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+def _retry_delay(resp: requests.Response, attempt: int) -> float:
+    retry_after = resp.headers.get("Retry-After")
+    if retry_after and retry_after.strip().isdigit():
+        return float(retry_after)
+    return min(60.0, 2.0 ** attempt) * (0.5 + random.random() / 2)
+
+
+def _fred_observations_request(q: Dict[str, Any], limiter: Optional[FredRateLimiter] = None) -> Dict[str, Any]:
+    url = "https://api.stlouisfed.org/fred/series/observations"
+    attempt = 0
+    while True:
+        if limiter is not None:
+            limiter.acquire()
+        # Con limitador los reintentos los gestiona este bucle (sesión sin reintentos)
+        resp = http_get("fred", url, params=q, headers={"Accept": "application/json"}, retry=limiter is None)
+        retryable = resp.status_code == 429 or resp.status_code >= 500
+        if limiter is None or not retryable or attempt >= limiter.max_retries:
+            break
+        limiter.penalize(_retry_delay(resp, attempt))
+        attempt += 1
+    resp.raise_for_status()
+    if limiter is not None:
+        limiter.reward()
+    obj = resp.json()
+    if "observations" not in obj:
+        raise RuntimeError("Estructura inesperada de la API de FRED; falta 'observations'.")
+    return obj
+
+
+def _fred_float(values: List[str]) -> np.ndarray:
+    # "." es el valor ausente de FRED
+    arr = np.array(values, dtype=object)
+    arr[arr == "."] = "nan"
+    return arr.astype(np.float64)
+
+
+def _observations_frame(observations: List[Dict[str, str]], typed: bool = True) -> pd.DataFrame:
+    """
+    DataFrame de observaciones construido columna a columna.
+
+    Con typed=True: date -> datetime64, value (y cualquier otra columna de
+    valores, p. ej. las de output_type 2/3) -> float64 con "." -> NaN, y
+    realtime_start/realtime_end -> category (suelen ser constantes o tener
+    pocos vintages distintos).
+    """
+    if not typed:
+        return pd.DataFrame(observations)
+    # Sin observaciones: mismas columnas y tipos que con datos
+    keys = list(observations[0]) if observations else ["realtime_start", "realtime_end", "date", "value"]
+
+    columns: Dict[str, Any] = {}
+    for key in keys:
+        values = [o.get(key, ".") for o in observations]
+        if key in ("realtime_start", "realtime_end"):
+            columns[key] = pd.Categorical(pd.Index(values, dtype="str"))
+        elif key == "date":
+            columns[key] = np.array(values, dtype="datetime64[D]")
+        else:
+            columns[key] = _fred_float(values)
+    return pd.DataFrame(columns)
+
+
 def fred_api_function(
     series_id: str,
     observation_start: Optional[str] = None,
@@ -31,7 +151,27 @@ def fred_api_function(
     output_type: Optional[int] = None,
     vintage_dates: Optional[str] = None,
     api_key: Optional[str] = None,
+    paginate: bool = False,
+    max_workers: int = 4,
+    limiter: Optional[FredRateLimiter] = None,
+    typed: bool = True,
 ):
+    """
+    Observaciones de una serie vía FRED API v1 (JSON) como DataFrame.
+
+    Con typed=True (por defecto) las columnas se construyen ya tipadas a
+    partir del JSON: date datetime64, value float64 ("." -> NaN) y
+    realtime_start/realtime_end categóricas. typed=False devuelve las
+    columnas de texto tal cual llegan de la API.
+
+    Con paginate=True se descargan todas las páginas (máximo FRED_MAX_LIMIT
+    observaciones cada una, o 'limit' si se indica) a partir de 'offset':
+    la primera petición devuelve 'count' y el resto de páginas se piden en
+    paralelo con hasta max_workers hilos.
+
+    limiter (FredRateLimiter, opcional) controla el ritmo de todas las
+    peticiones y reintenta con espera adaptativa ante 429/5xx.
+    """
     if api_key is None:
         api_key = os.environ.get("FRED_API_KEY")
     if not api_key:
@@ -52,7 +192,6 @@ def fred_api_function(
     if output_type is not None and output_type not in {1,2,3,4}:
         raise ValueError("'output_type' debe ser uno de 1,2,3,4")
 
-    url = "https://api.stlouisfed.org/fred/series/observations"
     q = {
         "series_id": series_id,
         "api_key": api_key,
@@ -71,11 +210,67 @@ def fred_api_function(
     if output_type is not None: q["output_type"] = output_type
     if vintage_dates: q["vintage_dates"] = vintage_dates
 
-    resp = requests.get(url, params=q, headers={"Accept": "application/json"}, timeout=120)
-    resp.raise_for_status()
-    obj = resp.json()
-    if "observations" not in obj:
-        raise RuntimeError("Estructura inesperada de la API de FRED; falta 'observations'.")
-    return pd.DataFrame(obj["observations"])  # already flattened keys
+    if not paginate:
+        obj = _fred_observations_request(q, limiter)
+        return _observations_frame(obj["observations"], typed)
+
+    # Paginación: la primera página informa de 'count'; el resto de offsets
+    # se piden en paralelo y se unen en orden.
+    start = offset or 0
+    page = limit or FRED_MAX_LIMIT
+    first = _fred_observations_request({**q, "limit": page, "offset": start}, limiter)
+    observations = list(first["observations"])
+    count = int(first.get("count", len(observations)))
+    offsets = list(range(start + page, count, page))
+    if offsets and len(observations) >= page:
+        def fetch(off: int) -> list:
+            return _fred_observations_request({**q, "limit": page, "offset": off}, limiter)["observations"]
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            for obs in pool.map(fetch, offsets):
+                observations.extend(obs)
+    return _observations_frame(observations, typed)
+
+
+fred_api_function_async = make_async(fred_api_function, host="api.stlouisfed.org")
+
+
+def fred_bulk_function(
+    series: Iterable[Union[str, Dict[str, Any]]],
+    rate_per_minute: float = 120,
+    max_workers: int = 8,
+    max_retries: int = 5,
+    raise_errors: bool = True,
+    api_key: Optional[str] = None,
+) -> Iterator[Tuple[str, Union[pd.DataFrame, Exception]]]:
+    """
+    Descargar muchas series de FRED en paralelo respetando la cuota de la API.
+
+    series es una lista de series_id o de dicts con 'series_id' y el resto de
+    opciones de fred_api_function (p. ej. {"series_id": "GDPC1",
+    "observation_start": "2000-01-01"}). Todas las peticiones comparten un
+    FredRateLimiter de rate_per_minute peticiones/minuto (cuota de la clave)
+    con reintentos adaptativos ante 429/5xx.
 
+    Es un generador: produce (series_id, DataFrame) según van terminando. Con
+    raise_errors=False los fallos se devuelven como (series_id, excepción).
+    """
+    limiter = FredRateLimiter(rate_per_minute=rate_per_minute, max_retries=max_retries)
+    specs = [{"series_id": s} if isinstance(s, str) else dict(s) for s in series]
+    if api_key is not None:
+        for spec in specs:
+            spec.setdefault("api_key", api_key)
 
+    pool = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        futures = {pool.submit(fred_api_function, **spec, limiter=limiter): spec["series_id"] for spec in specs}
+        for fut in as_completed(futures):
+            series_id = futures[fut]
+            try:
+                yield series_id, fut.result()
+            except Exception as exc:
+                if raise_errors:
+                    raise
+                yield series_id, exc
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from fred_function import fred_api_function
+
+# Inicio y fin "abierto" del tiempo real en ALFRED
+REALTIME_FIRST = "1776-07-04"
+REALTIME_LAST = "9999-12-31"
+
+
+def _to_days(values) -> np.ndarray:
+    # Fechas ISO -> días desde 1970-01-01 (int32); admite 9999-12-31
+    return np.asarray(pd.Series(values).astype(str), dtype="datetime64[D]").astype(np.int32)
+
+
+def _from_days(days: np.ndarray) -> np.ndarray:
+    return np.asarray(days, dtype=np.int64).astype("datetime64[D]")
+
+
+class FredVintageStore:
+    """
+    Almacén compacto de vintages (ALFRED) de una serie de FRED.
+
+    Guarda cada observación como su valor base (primera publicación) más las
+    revisiones posteriores, en arrays columnares con fechas enteras (días
+    desde 1970-01-01):
+
+    - dates: fechas de observación distintas (int32, ordenadas).
+    - event_obs: índice en 'dates' de cada evento (int32).
+    - event_vintage: fecha de tiempo real desde la que rige el valor (int32).
+    - event_value: valor (float64; NaN = observación retirada).
+
+    Los eventos están ordenados por (event_obs, event_vintage) y solo se
+    guarda un evento cuando el valor cambia, de modo que no se repite la
+    observación en cada vintage.
+    """
+
+    def __init__(self, dates, event_obs, event_vintage, event_value, series_id: Optional[str] = None) -> None:
+        self.series_id = series_id
+        self.dates = np.asarray(dates, dtype=np.int32)
+        self.event_obs = np.asarray(event_obs, dtype=np.int32)
+        self.event_vintage = np.asarray(event_vintage, dtype=np.int32)
+        self.event_value = np.asarray(event_value, dtype=np.float64)
+
+    @classmethod
+    def from_observations(cls, df: pd.DataFrame, series_id: Optional[str] = None) -> "FredVintageStore":
+        """
+        Construir el almacén desde la salida de fred_api_function con
+        output_type=1 (columnas realtime_start, realtime_end, date, value).
+        """
+        obs = _to_days(df["date"])
+        rs = _to_days(df["realtime_start"])
+        re_ = _to_days(df["realtime_end"])
+        val = pd.to_numeric(pd.Series(df["value"]).replace(".", np.nan), errors="coerce").to_numpy(dtype=np.float64)
+
+        order = np.lexsort((rs, obs))
+        obs, rs, re_, val = obs[order], rs[order], re_[order], val[order]
+
+        # Si un periodo de validez termina antes de que empiece el siguiente
+        # (o no llega al final abierto), la observación se retiró: evento NaN
+        open_end = _to_days([REALTIME_LAST])[0]
+        same_next = np.r_[obs[1:] == obs[:-1], False]
+        next_rs = np.r_[rs[1:], open_end]
+        gap = np.where(same_next, re_ + 1 < next_rs, re_ < open_end)
+
+        ev_obs = np.concatenate([obs, obs[gap]])
+        ev_vin = np.concatenate([rs, re_[gap] + 1])
+        ev_val = np.concatenate([val, np.full(int(gap.sum()), np.nan)])
+        order = np.lexsort((ev_vin, ev_obs))
+        ev_obs, ev_vin, ev_val = ev_obs[order], ev_vin[order], ev_val[order]
+
+        # Compactar: conservar solo los eventos que cambian el valor
+        first = np.r_[True, ev_obs[1:] != ev_obs[:-1]]
+        prev = np.r_[np.nan, ev_val[:-1]]
+        unchanged = (ev_val == prev) | (np.isnan(ev_val) & np.isnan(prev))
+        keep = first | ~unchanged
+        ev_obs, ev_vin, ev_val = ev_obs[keep], ev_vin[keep], ev_val[keep]
+
+        dates, obs_idx = np.unique(ev_obs, return_inverse=True)
+        return cls(dates, obs_idx, ev_vin, ev_val, series_id=series_id)
+
+    @property
+    def nbytes(self) -> int:
+        return self.dates.nbytes + self.event_obs.nbytes + self.event_vintage.nbytes + self.event_value.nbytes
+
+    def vintage_dates(self) -> pd.DatetimeIndex:
+        """Fechas de tiempo real en las que cambió algún valor."""
+        return pd.DatetimeIndex(_from_days(np.unique(self.event_vintage)))
+
+    def _as_of_days(self, day: int) -> np.ndarray:
+        # Valor vigente de cada fecha de observación en el día 'day' (NaN si
+        # aún no publicada o retirada)
+        out = np.full(self.dates.size, np.nan)
+        idx = np.flatnonzero(self.event_vintage <= day)
+        if idx.size:
+            obs = self.event_obs[idx]
+            last = idx[np.r_[obs[1:] != obs[:-1], True]]
+            out[self.event_obs[last]] = self.event_value[last]
+        return out
+
+    def as_of(self, date) -> pd.DataFrame:
+        """Serie tal como se conocía en la fecha 'date' (columnas date, value)."""
+        values = self._as_of_days(_to_days([date])[0])
+        mask = ~np.isnan(values)
+        return pd.DataFrame({"date": pd.to_datetime(_from_days(self.dates[mask])), "value": values[mask]})
+
+    def revision_triangle(self, vintages: Optional[Iterable] = None) -> pd.DataFrame:
+        """
+        Matriz fecha de observación x vintage con el valor vigente en cada
+        vintage. Por defecto usa todas las fechas en que cambió algún valor.
+        """
+        days = np.unique(self.event_vintage) if vintages is None else _to_days(list(vintages))
+        matrix = np.column_stack([self._as_of_days(d) for d in days]) if len(days) else np.empty((self.dates.size, 0))
+        return pd.DataFrame(
+            matrix,
+            index=pd.DatetimeIndex(_from_days(self.dates), name="date"),
+            columns=pd.DatetimeIndex(_from_days(days), name="vintage"),
+        )
+
+    def revisions(self) -> pd.DataFrame:
+        """Eventos en formato largo: date, vintage, value, is_base."""
+        first = np.r_[True, self.event_obs[1:] != self.event_obs[:-1]]
+        return pd.DataFrame(
+            {
+                "date": pd.to_datetime(_from_days(self.dates[self.event_obs])),
+                "vintage": pd.to_datetime(_from_days(self.event_vintage)),
+                "value": self.event_value,
+                "is_base": first,
+            }
+        )
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(
+            path,
+            dates=self.dates,
+            event_obs=self.event_obs,
+            event_vintage=self.event_vintage,
+            event_value=self.event_value,
+            series_id=np.array(self.series_id or ""),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "FredVintageStore":
+        with np.load(path) as z:
+            return cls(z["dates"], z["event_obs"], z["event_vintage"], z["event_value"], series_id=str(z["series_id"]) or None)
+
+    def __repr__(self) -> str:
+        return f"FredVintageStore({self.series_id!r}, dates={self.dates.size}, events={self.event_value.size})"
+
+
+def fred_vintage_store(series_id: str, **kwargs) -> FredVintageStore:
+    """
+    Descargar toda la historia de vintages de una serie (ALFRED) y devolver
+    un FredVintageStore. kwargs se pasan a fred_api_function.
+    """
+    kwargs.setdefault("realtime_start", REALTIME_FIRST)
+    kwargs.setdefault("realtime_end", REALTIME_LAST)
+    kwargs.setdefault("paginate", True)
+    df = fred_api_function(series_id, **kwargs)
+    return FredVintageStore.from_observations(df, series_id=series_id)
@@ -1,7 +1,13 @@
 from __future__ import annotations
 
+import os
+import sys
+
 from imf_function import imf_api_function
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from columnar_store import save_to_store  # noqa: E402
+
 # Ejemplo: QNEA PIB trimestral SA XDC para España y Francia, 2020-Q1..2020-Q4
 df = imf_api_function(
     dataset_identifier="QNEA",
@@ -12,3 +18,6 @@ df = imf_api_function(
 )
 
 df.to_csv("imf_example.csv", index=False)
+
+# Copia tipada en el almacén columnar si pyarrow está instalado (Parquet particionado por fuente/dataset/fecha)
+save_to_store(df, "imf", "QNEA")
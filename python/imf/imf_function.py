@@ -1,10 +1,17 @@
 from __future__ import annotations
 
-import io
-from typing import Dict, Iterable
+import os
+import sys
+from typing import Dict, Iterable, Optional
 
 import pandas as pd
-import requests
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from http_cache import ValidatingCache  # noqa: E402
+from async_fetch import make_async  # noqa: E402
+from http_session import http_get  # noqa: E402
+from period_cache import PeriodRangeCache  # noqa: E402
+from sdmx_csv import read_sdmx_csv  # noqa: E402
 
 
 def imf_api_function(
@@ -15,16 +22,47 @@ def imf_api_function(
     dataset_version: str = "+",
     accept_csv_version: str = "1.0.0",
     base_url: str = "https://api.imf.org/external/sdmx/3.0/data/dataflow",
+    engine: str = "c",
+    cache: Optional[ValidatingCache] = None,
+    period_cache: Optional[PeriodRangeCache] = None,
+    use_response_cache: bool = True,
 ) -> pd.DataFrame:
     """
     Descargar datos desde el FMI (SDMX 3.0 CSV) y devolver un DataFrame.
     - dataset_identifier: p. ej., "QNEA"
     - data_selection: clave SDMX (p. ej., "ESP.B1GQ.Q.SA.XDC.Q" o "ESP+FRA.B1GQ.Q.SA.XDC.Q")
     - filters: dict como { 'TIME_PERIOD': ['ge:2020-Q1','le:2020-Q4'] }
+    - engine: motor del lector SDMX-CSV compartido ("c" o "pyarrow")
+    - cache: ValidatingCache opcional; revalida con ETag/Last-Modified y, si
+      el FMI responde 304, devuelve el DataFrame guardado sin descargarlo
+    - period_cache: PeriodRangeCache opcional; del rango de filters['TIME_PERIOD']
+      ('ge:'/'le:') solo se descargan los periodos que no estén en caché
+    - use_response_cache: False no usa la caché de respuestas aunque esté
+      activa (las descargas de period_cache siempre la omiten)
     """
     if filters is None:
         filters = {}
 
+    if period_cache is not None:
+        time_filter = filters.get("TIME_PERIOD") or []
+        if isinstance(time_filter, str):
+            time_filter = [time_filter]
+        bounds = {str(v).split(":", 1)[0]: str(v).split(":", 1)[1] for v in time_filter if ":" in str(v)}
+        other = {k: v for k, v in filters.items() if k != "TIME_PERIOD"}
+
+        def fetch(start: Optional[str], end: Optional[str]) -> pd.DataFrame:
+            window = [f"ge:{start}"] if start else []
+            window += [f"le:{end}"] if end else []
+            return imf_api_function(
+                dataset_identifier, data_selection, filters={**other, **({"TIME_PERIOD": window} if window else {})},
+                agency_identifier=agency_identifier, dataset_version=dataset_version,
+                accept_csv_version=accept_csv_version, base_url=base_url, engine=engine, cache=cache,
+                use_response_cache=False,
+            )
+
+        key = "imf|" + "|".join([base_url, agency_identifier, dataset_identifier, dataset_version, data_selection, repr(sorted(other.items()))])
+        return period_cache.get_frame(key, fetch, bounds.get("ge"), bounds.get("le"))
+
     # Construir la URL SDMX 3.0 CSV: base/agency/dataset/version/key
     # Codificar conservando reservados útiles (+,*,:,/ ,)
     from urllib.parse import quote
@@ -56,9 +94,14 @@ def imf_api_function(
         "Cache-Control": "no-cache",
     }
 
-    resp = requests.get(url, params=params, headers=headers, timeout=180)
+    if cache is not None:
+        return cache.get_frame(url, lambda body: read_sdmx_csv(body, engine=engine), params=params, headers=headers, provider="imf")
+
+    resp = http_get("imf", url, params=params, headers=headers, cache=use_response_cache)
     resp.raise_for_status()
 
-    text_stream = io.StringIO(resp.content.decode("utf-8"))
-    df = pd.read_csv(text_stream)
-    return df
+    return read_sdmx_csv(resp.content, engine=engine)
+
+
+imf_api_function_async = make_async(imf_api_function, host="api.imf.org")
+
@@ -1,9 +1,13 @@
 # Importamos la función y las librerías necesarias
 from ine_jaxi_function import ine_jaxi_api_function
 import os
+import sys
 from pathlib import Path
 import pandas as pd
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from columnar_store import save_to_store  # noqa: E402
+
 # Cambiamos el directorio de trabajo a la carpeta de este archivo
 os.chdir(os.path.dirname(os.path.abspath(__file__)))
 # Llamamos a la función (retorna un pandas DataFrame)
@@ -15,6 +19,5 @@ df = ine_jaxi_api_function(
 # Guardamos el DataFrame en un archivo CSV
 df.to_csv("ine_jaxi_example.csv", index=False, sep=";", encoding="utf-8")
 
-
-
-
+# Y en el almacén columnar si pyarrow está instalado (Parquet particionado por fuente/tabla/fecha)
+save_to_store(df, "ine", "67821")
@@ -1,9 +1,104 @@
-import io
-from typing import Optional
+import json
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Any, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
 
+import numpy as np
 import requests
 import pandas as pd
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from async_fetch import make_async  # noqa: E402
+from http_session import http_get, http_head  # noqa: E402
+
+# Códigos de Periodo del INE: 2023 (anual), 2023S1, 2023T4, 2024M01,
+# 2024SM05 (semana) y 2024M01D15 (diario)
+_PERIODO_RE = re.compile(r"^(\d{4})(?:(SM|T|M|S)(\d{1,2}))?(?:D(\d{1,2}))?$")
+
+
+def _ine_periodo(code: str) -> Tuple[pd.Timestamp, Optional[str]]:
+    # Fecha de inicio y frecuencia (A, S, Q, M, W, D) de un código de Periodo
+    m = _PERIODO_RE.match(str(code).strip())
+    if m is None:
+        return pd.NaT, None
+    year, kind, num, day = m.groups()
+    year = int(year)
+    if kind is None:
+        return pd.Timestamp(year, 1, 1), "A"
+    n = int(num)
+    try:
+        if kind == "SM":
+            return pd.Timestamp(date.fromisocalendar(year, n, 1)), "W"
+        if kind == "S":
+            return pd.Timestamp(year, (n - 1) * 6 + 1, 1), "S"
+        if kind == "T":
+            return pd.Timestamp(year, (n - 1) * 3 + 1, 1), "Q"
+        if day is not None:
+            return pd.Timestamp(year, n, int(day)), "D"
+        return pd.Timestamp(year, n, 1), "M"
+    except ValueError:
+        return pd.NaT, None
+
+
+def _ine_number(values: pd.Index) -> np.ndarray:
+    # "1.234,5" -> 1234.5; ".." , "." y "" (marcas de dato no disponible) -> NaN
+    text = pd.Series(values, dtype=str).str.strip()
+    text = text.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    return pd.to_numeric(text, errors="coerce").to_numpy(dtype=np.float64)
+
+
+def ine_jaxi_typed(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convertir un CSV de JAXIT3 (leído como texto o category) a tipos útiles.
+
+    - Total -> float64 (coma decimal, punto de miles; "..", "." -> NaN).
+    - Periodo -> category, más Periodo_fecha (datetime64, inicio del
+      periodo) y Periodo_freq (A, S, Q, M, W, D).
+    - Resto de columnas (clasificaciones) -> category.
+
+    Las conversiones se hacen sobre los valores distintos (categorías) y se
+    expanden con los códigos enteros, no fila a fila.
+    """
+    out = pd.DataFrame(index=df.index)
+    for col in df.columns:
+        cat = df[col] if isinstance(df[col].dtype, pd.CategoricalDtype) else df[col].astype("category")
+        codes = cat.cat.codes.to_numpy()
+        if col == "Total":
+            parsed = np.append(_ine_number(cat.cat.categories), np.nan)
+            out[col] = parsed[codes]
+        elif col == "Periodo":
+            out[col] = cat
+            fechas, freqs = zip(*(_ine_periodo(c) for c in cat.cat.categories)) if len(cat.cat.categories) else ((), ())
+            fecha_arr = np.append(pd.DatetimeIndex(list(fechas), dtype="datetime64[ns]").to_numpy(), np.datetime64("NaT"))
+            out["Periodo_fecha"] = fecha_arr[codes]
+            freq_codes, freq_uniques = pd.factorize(np.array(list(freqs) + [None], dtype=object))
+            out["Periodo_freq"] = pd.Categorical.from_codes(freq_codes[codes], categories=freq_uniques)
+        else:
+            out[col] = cat
+    return out
+
+
+def _jaxi_url(table_id: str, directory: str = "t", locale: str = "es", variant: str = "csv_bdsc") -> str:
+    # URL de la API de INE JAXIT3
+    base_url = "https://www.ine.es/jaxiT3/files"
+    return f"{base_url}/{directory}/{locale}/{variant}/{table_id}.csv"
+
+
+def ine_jaxi_read_csv(source, typed: bool = False) -> pd.DataFrame:
+    """
+    Leer un CSV de JAXIT3 (ruta o flujo binario, ';' y UTF-8 con BOM) como
+    texto o, con typed=True, tipado (ver ine_jaxi_typed).
+    """
+    if typed:
+        return ine_jaxi_typed(pd.read_csv(source, sep=";", dtype="category", keep_default_na=False, encoding="utf-8-sig"))
+    df: pd.DataFrame = pd.read_csv(source, sep=";", dtype=str, encoding="utf-8-sig")
+    return df
+
 
 def ine_jaxi_api_function(
     table_id: str,
@@ -11,6 +106,7 @@ def ine_jaxi_api_function(
     directory: str = "t",
     locale: str = "es",
     variant: str = "csv_bdsc",
+    typed: bool = False,
 ) -> pd.DataFrame:
     """
     Descarga un archivo CSV de INE JAXIT3 y retorna un pandas DataFrame.
@@ -27,31 +123,152 @@ def ine_jaxi_api_function(
         Idioma del recurso. Por defecto "es".
     variant : str, optional
         Variante del CSV. Por defecto "csv_bdsc".
+    typed : bool, optional
+        Si es True, Total pasa a float64, Periodo se interpreta (columnas
+        Periodo_fecha y Periodo_freq) y las clasificaciones a category
+        (ver ine_jaxi_typed). Por defecto False.
 
     Retorna
     -------
     pandas.DataFrame
-        CSV parseado como un DataFrame con columnas de texto.
+        CSV parseado como un DataFrame con columnas de texto (o tipadas con
+        typed=True).
     """
 
-    # URL de la API de INE JAXIT3
-    base_url = "https://www.ine.es/jaxiT3/files"
-    url = f"{base_url}/{directory}/{locale}/{variant}/{table_id}.csv"
+    url = _jaxi_url(table_id, directory, locale, variant)
 
     # Parámetros de la petición
     headers = {"Accept": "text/csv"}
     params = {"nocab": nocab}
 
-    # Hacemos la petición
-    resp = requests.get(url, headers=headers, params=params, timeout=60)
-    try:
-        resp.raise_for_status()
-    except requests.HTTPError as exc:
-        raise RuntimeError(f"INE JAXIT3 request failed [{resp.status_code}]") from exc
+    # Hacemos la petición en streaming: el CSV pasa al parser según llega,
+    # sin guardar el cuerpo completo en memoria
+    resp = http_get("ine", url, headers=headers, params=params, stream=True)
+    with resp:
+        try:
+            resp.raise_for_status()
+        except requests.HTTPError as exc:
+            raise RuntimeError(f"INE JAXIT3 request failed [{resp.status_code}]") from exc
 
-    # Parseamos el CSV con pandas
-    text_stream = io.StringIO(resp.content.decode("utf-8-sig"))
-    df: pd.DataFrame = pd.read_csv(text_stream, sep=";", dtype=str)
-    return df
+        # Parseamos el CSV con pandas
+        resp.raw.decode_content = True
+        return ine_jaxi_read_csv(resp.raw, typed=typed)
+
+
+ine_jaxi_api_function_async = make_async(ine_jaxi_api_function, host="www.ine.es")
+
+
+def _save_state(path: str, state: Dict[str, Any]) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def ine_jaxi_bulk_function(
+    table_ids: Iterable[str],
+    dest_dir: str = "ine_jaxi",
+    max_workers: int = 8,
+    max_per_host: int = 4,
+    nocab: str = "1",
+    directory: str = "t",
+    locale: str = "es",
+    variant: str = "csv_bdsc",
+    chunk_size: int = 1 << 20,
+    force: bool = False,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Descargar muchas tablas JAXIT3 en paralelo, en streaming a disco.
+
+    Cada tabla se guarda como dest_dir/<table_id>.csv escribiendo la
+    respuesta por bloques de chunk_size bytes (nunca está entera en
+    memoria). Las tablas se descargan con hasta max_workers hilos y como
+    mucho max_per_host conexiones simultáneas por host.
+
+    Antes de descargar se pide un HEAD: si el tamaño (Content-Length) y la
+    fecha (Last-Modified) coinciden con los de la última ejecución
+    (dest_dir/_ine_jaxi_state.json) y el fichero existe, la tabla se omite.
+    Si el HEAD falla (p. ej. 405) se comparan las cabeceras del GET y, si
+    no hay cambios, se cierra sin leer el cuerpo. force=True descarga todas.
+
+    Retorna
+    -------
+    dict
+        table_id -> {'status': 'downloaded' | 'unchanged' | 'error', 'path',
+        'bytes', 'size', 'last_modified', y 'error' si falló}.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    state_path = os.path.join(dest_dir, "_ine_jaxi_state.json")
+    state: Dict[str, Any] = {}
+    if os.path.exists(state_path):
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+
+    host_slots: Dict[str, threading.BoundedSemaphore] = {}
+    lock = threading.Lock()
+
+    def slot(url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with lock:
+            return host_slots.setdefault(host, threading.BoundedSemaphore(max(1, max_per_host)))
+
+    def download(table_id: str) -> Dict[str, Any]:
+        url = _jaxi_url(table_id, directory, locale, variant)
+        path = os.path.join(dest_dir, f"{table_id}.csv")
+        params = {"nocab": nocab}
+        headers = {"Accept": "text/csv"}
+        result: Dict[str, Any] = {"path": path, "bytes": 0}
+        previous = state.get(table_id, {})
+
+        def unchanged(size: Optional[str], last_modified: Optional[str]) -> bool:
+            return (
+                not force
+                and (size is not None or last_modified is not None)
+                and os.path.exists(path)
+                and previous.get("size") == size
+                and previous.get("last_modified") == last_modified
+            )
+
+        try:
+            with slot(url):
+                # Si el servidor no admite HEAD (p. ej. 405) se comparan las
+                # cabeceras del propio GET antes de leer el cuerpo
+                try:
+                    head = http_head("ine", url, params=params, headers=headers)
+                    head.raise_for_status()
+                except requests.RequestException:
+                    head = None
+                if head is not None:
+                    result["size"] = head.headers.get("Content-Length")
+                    result["last_modified"] = head.headers.get("Last-Modified")
+                    if unchanged(result["size"], result["last_modified"]):
+                        result["status"] = "unchanged"
+                        return result
 
+                with http_get("ine", url, params=params, headers=headers, stream=True, cache=False) as resp:
+                    resp.raise_for_status()
+                    if head is None:
+                        result["size"] = resp.headers.get("Content-Length")
+                        result["last_modified"] = resp.headers.get("Last-Modified")
+                        if unchanged(result["size"], result["last_modified"]):
+                            result["status"] = "unchanged"
+                            return result
+                    result["last_modified"] = resp.headers.get("Last-Modified", result["last_modified"])
+                    part = f"{path}.part"
+                    with open(part, "wb") as f:
+                        for chunk in resp.iter_content(chunk_size=chunk_size):
+                            f.write(chunk)
+                            result["bytes"] += len(chunk)
+                    os.replace(part, path)
+            result["status"] = "downloaded"
+            with lock:
+                state[table_id] = {"size": result["size"], "last_modified": result["last_modified"]}
+                _save_state(state_path, state)
+        except (requests.RequestException, OSError) as exc:
+            result["status"] = "error"
+            result["error"] = str(exc)
+        return result
 
+    table_ids = list(dict.fromkeys(str(t) for t in table_ids))
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        return dict(zip(table_ids, pool.map(download, table_ids)))
@@ -16,11 +16,12 @@ nocab = "1"         # "1" para evitar cabeceras adicionales
 # Construcción de URL y petición
 url = f"https://www.ine.es/jaxiT3/files/t/es/csv_bdsc/{table_id}.csv"
 params = {"nocab": nocab}
-resp = requests.get(url, params=params, headers={"Accept": "text/csv"}, timeout=60)
+resp = requests.get(url, params=params, headers={"Accept": "text/csv"}, timeout=60, stream=True)
 resp.raise_for_status()
 
-# Guardar contenido en CSV en esta carpeta
+# Guardar contenido en CSV en esta carpeta, por bloques (sin cargarlo entero en memoria)
 with open("ine_jaxi_min.csv", "wb") as f:
-    f.write(resp.content)
+    for chunk in resp.iter_content(chunk_size=1 << 20):
+        f.write(chunk)
 
 
@@ -0,0 +1,25 @@
+# Importamos las funciones y las librerías necesarias
+from ine_tempus_function import ine_tempus_series_function, ine_tempus_table_function, ine_tempus_sync_function
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from columnar_store import save_to_store  # noqa: E402
+
+# Cambiamos el directorio de trabajo a la carpeta de este archivo
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+# Últimos 5 periodos de una serie (DATOS_SERIE)
+df_serie = ine_tempus_series_function("IPC251856", nult=5)
+df_serie.to_csv("ine_tempus_serie_example.csv", index=False)
+
+# Datos de una tabla filtrada desde 2023 (DATOS_TABLA)
+df_tabla = ine_tempus_table_function("50902", date_start="2023/01/01", filters={"3": ["74"]})
+df_tabla.to_csv("ine_tempus_tabla_example.csv", index=False)
+
+# Copia tipada en el almacén columnar si pyarrow está instalado (Parquet particionado por fuente/tabla/fecha)
+save_to_store(df_tabla, "ine_tempus", "50902")
+
+# Almacén local: la primera vez descarga todo, después solo los periodos nuevos
+series, report = ine_tempus_sync_function(["IPC251856", "IPC251852"], store_dir="ine_tempus_store")
+print(report)
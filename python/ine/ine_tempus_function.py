@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import requests
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from async_fetch import make_async  # noqa: E402
+from http_session import http_get  # noqa: E402
+
+# Columnas de cada observación en la respuesta de Tempus
+_DATA_COLUMNS = ["Fecha", "FK_TipoDato", "FK_Periodo", "Anyo", "Valor", "Secreto"]
+
+
+def _tempus_date(value: Optional[str]) -> str:
+    # "2023/01/01", "2023-01-01" o "20230101" -> "20230101"
+    return re.sub(r"\D", "", str(value)) if value else ""
+
+
+def ine_tempus_api_function(
+    operation: str,
+    code: str,
+    lang: str = "ES",
+    nult: Optional[int] = None,
+    date_start: Optional[str] = None,
+    date_end: Optional[str] = None,
+    filters: Optional[Dict[str, Iterable[str]]] = None,
+    det: Optional[int] = None,
+    use_response_cache: bool = True,
+) -> Any:
+    """
+    Petición a la API JSON de INE Tempus (wstempus) y JSON sin procesar.
+
+    Parámetros
+    ----------
+    operation : str
+        Función de la API, p. ej. "DATOS_SERIE" o "DATOS_TABLA".
+    code : str
+        Código de la serie (p. ej. "IPC251856") o id de la tabla (p. ej. "50902").
+    lang : str, optional
+        "ES" o "EN". Por defecto "ES".
+    nult : int, optional
+        Solo los últimos N periodos de cada serie.
+    date_start, date_end : str, optional
+        Rango de fechas ("YYYY/MM/DD", "YYYY-MM-DD" o "YYYYMMDD"). Sin
+        date_end se devuelven todos los datos desde date_start.
+    filters : dict, optional
+        Solo DATOS_TABLA: {id_variable: [id_valor, ...]} (parámetros tv).
+    det : int, optional
+        Nivel de detalle de la respuesta (0, 1 o 2).
+    use_response_cache : bool, optional
+        False no usa la caché de respuestas aunque esté activa.
+    """
+    url = f"https://servicios.ine.es/wstempus/js/{lang}/{operation}/{code}"
+    params: List[Tuple[str, str]] = []
+    if nult is not None:
+        params.append(("nult", str(nult)))
+    if date_start or date_end:
+        params.append(("date", f"{_tempus_date(date_start)}:{_tempus_date(date_end)}"))
+    if det is not None:
+        params.append(("det", str(det)))
+    for var, values in (filters or {}).items():
+        if isinstance(values, (str, int)):
+            values = [values]
+        params.extend(("tv", f"{var}:{v}") for v in values)
+
+    resp = http_get("ine", url, params=params, headers={"Accept": "application/json"}, cache=use_response_cache)
+    try:
+        resp.raise_for_status()
+    except requests.HTTPError as exc:
+        raise RuntimeError(f"INE Tempus request failed [{resp.status_code}]") from exc
+    return resp.json()
+
+
+ine_tempus_api_function_async = make_async(ine_tempus_api_function, host="servicios.ine.es")
+
+
+def _series_frame(series: Dict[str, Any]) -> pd.DataFrame:
+    # Observaciones de una serie (campo Data) con tipos: Fecha datetime64
+    # (día de inicio del periodo en hora de Madrid), Valor float64
+    data = series.get("Data") or []
+    df = pd.DataFrame({c: [d.get(c) for d in data] for c in _DATA_COLUMNS})
+    fecha = df["Fecha"]
+    if pd.api.types.is_numeric_dtype(fecha):
+        fecha = pd.to_datetime(fecha, unit="ms", utc=True)
+    else:
+        fecha = pd.to_datetime(fecha, utc=True, format="ISO8601")
+    df["Fecha"] = fecha.dt.tz_convert("Europe/Madrid").dt.tz_localize(None).dt.normalize()
+    df["Valor"] = pd.to_numeric(df["Valor"], errors="coerce").astype(np.float64)
+    df["Secreto"] = df["Secreto"].fillna(False).astype(bool)
+    df.insert(0, "COD", series.get("COD"))
+    df.insert(1, "Nombre", series.get("Nombre"))
+    return df
+
+
+def _series_list_frame(objs: List[Dict[str, Any]]) -> pd.DataFrame:
+    frames = [_series_frame(s) for s in objs]
+    if not frames:
+        return pd.DataFrame(columns=["COD", "Nombre"] + _DATA_COLUMNS)
+    df = pd.concat(frames, ignore_index=True)
+    df["COD"] = df["COD"].astype("category")
+    df["Nombre"] = df["Nombre"].astype("category")
+    return df
+
+
+def ine_tempus_series_function(
+    cod_series: str,
+    nult: Optional[int] = None,
+    date_start: Optional[str] = None,
+    date_end: Optional[str] = None,
+    lang: str = "ES",
+    use_response_cache: bool = True,
+) -> pd.DataFrame:
+    """
+    Datos de una serie Tempus (DATOS_SERIE) como DataFrame.
+
+    Columnas: COD, Nombre, Fecha (datetime64), FK_TipoDato, FK_Periodo, Anyo,
+    Valor (float64) y Secreto (bool). use_response_cache=False no usa la
+    caché de respuestas aunque esté activa.
+    """
+    obj = ine_tempus_api_function(
+        "DATOS_SERIE", cod_series, lang=lang, nult=nult, date_start=date_start, date_end=date_end,
+        use_response_cache=use_response_cache,
+    )
+    return _series_list_frame([obj] if isinstance(obj, dict) else obj)
+
+
+ine_tempus_series_function_async = make_async(ine_tempus_series_function, host="servicios.ine.es")
+
+
+def ine_tempus_table_function(
+    table_id: str,
+    nult: Optional[int] = None,
+    date_start: Optional[str] = None,
+    date_end: Optional[str] = None,
+    filters: Optional[Dict[str, Iterable[str]]] = None,
+    lang: str = "ES",
+) -> pd.DataFrame:
+    """
+    Datos de todas las series de una tabla Tempus (DATOS_TABLA) en formato
+    largo (una fila por serie y periodo; mismas columnas que
+    ine_tempus_series_function). filters restringe las series con
+    {id_variable: [id_valor, ...]}.
+    """
+    objs = ine_tempus_api_function(
+        "DATOS_TABLA", table_id, lang=lang, nult=nult, date_start=date_start, date_end=date_end, filters=filters
+    )
+    return _series_list_frame(objs)
+
+
+ine_tempus_table_function_async = make_async(ine_tempus_table_function, host="servicios.ine.es")
+
+
+def ine_tempus_batch_function(
+    cod_series: Iterable[str],
+    nult: Optional[int] = None,
+    date_start: Optional[str] = None,
+    date_end: Optional[str] = None,
+    lang: str = "ES",
+    max_workers: int = 8,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Descargar muchas series Tempus en paralelo (max_workers hilos sobre la
+    sesión HTTP compartida, con conexiones reutilizables). Retorna
+    cod_series -> DataFrame.
+    """
+    cod_series = list(dict.fromkeys(cod_series))
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        frames = pool.map(
+            lambda cod: ine_tempus_series_function(cod, nult, date_start, date_end, lang=lang),
+            cod_series,
+        )
+        return dict(zip(cod_series, frames))
+
+
+def ine_tempus_sync_function(
+    cod_series: Iterable[str],
+    store_dir: Optional[str] = None,
+    lang: str = "ES",
+    max_workers: int = 8,
+) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Dict[str, Any]]]:
+    """
+    Sincronización incremental de series Tempus con un almacén local.
+
+    Cada serie se guarda en store_dir/<COD>.csv (por defecto
+    ~/.cache/apis/ine_tempus). La primera vez se descarga completa; después
+    solo se piden los periodos desde la última Fecha guardada (incluida, por
+    si se ha revisado) y se fusionan por Fecha.
+
+    Retorna
+    -------
+    (series, report)
+        series: COD -> DataFrame completo actualizado.
+        report: COD -> dict con 'full_download', 'received', 'new',
+        'revised' y 'unchanged'.
+    """
+    if store_dir is None:
+        store_dir = os.path.join(os.path.expanduser("~"), ".cache", "apis", "ine_tempus")
+    os.makedirs(store_dir, exist_ok=True)
+
+    def sync(cod: str) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        path = os.path.join(store_dir, f"{cod}.csv")
+        stored: Optional[pd.DataFrame] = None
+        if os.path.exists(path):
+            stored = pd.read_csv(path, parse_dates=["Fecha"])
+        full = stored is None or stored.empty
+        start = None if full else stored["Fecha"].max().strftime("%Y%m%d")
+        update = ine_tempus_series_function(cod, date_start=start, lang=lang, use_response_cache=False)
+        update["COD"] = update["COD"].astype(str)
+        update["Nombre"] = update["Nombre"].astype(str)
+
+        report: Dict[str, Any] = {"full_download": full, "received": len(update), "new": 0, "revised": 0, "unchanged": 0}
+        if full:
+            merged = update
+            report["new"] = len(update)
+        elif update.empty:
+            merged = stored
+        else:
+            both = update.merge(stored[["Fecha", "Valor"]], on="Fecha", how="left", suffixes=("", "_stored"), indicator=True)
+            known = (both["_merge"] == "both").to_numpy()
+            new_val = both["Valor"].to_numpy(dtype=float)
+            old_val = both["Valor_stored"].to_numpy(dtype=float)
+            same = known & ((new_val == old_val) | (np.isnan(new_val) & np.isnan(old_val)))
+            report["new"] = int((~known).sum())
+            report["revised"] = int((known & ~same).sum())
+            report["unchanged"] = int(same.sum())
+            merged = pd.concat([stored[~stored["Fecha"].isin(update["Fecha"])], update], ignore_index=True)
+            merged = merged.sort_values("Fecha", kind="stable").reset_index(drop=True)
+
+        tmp = f"{path}.tmp"
+        merged.to_csv(tmp, index=False)
+        os.replace(tmp, path)
+        return merged, report
+
+    cod_series = list(dict.fromkeys(cod_series))
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        results = list(pool.map(sync, cod_series))
+    return (
+        {cod: df for cod, (df, _) in zip(cod_series, results)},
+        {cod: rep for cod, (_, rep) in zip(cod_series, results)},
+    )
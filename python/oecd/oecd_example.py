@@ -2,11 +2,15 @@
 # ----------------------------------------------------------------------------
 # 1) Cargar la función
 # 2) Ejecutar la consulta indicando agencia, dataset y selección
-# 3) Guardar el resultado como CSV
+# 3) Guardar el resultado como CSV y en el almacén columnar (Parquet)
 # ----------------------------------------------------------------------------
 import os
+import sys
 from oecd_function import oecd_api_function
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from columnar_store import save_to_store  # noqa: E402
+
 
 def main() -> None:
     # Asegurar rutas relativas coherentes
@@ -24,6 +28,7 @@ def main() -> None:
 
     # Guardar el resultado
     df.to_csv("oecd_example.csv", index=False)
+    save_to_store(df, "oecd", "DSD_EO@DF_EO")
 
 
 if __name__ == "__main__":
@@ -1,9 +1,24 @@
 from __future__ import annotations
 
-import io
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
 import pandas as pd
 import requests
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from async_fetch import make_async  # noqa: E402
+from http_session import RETRY_SETTINGS, http_get  # noqa: E402
+from period_cache import PeriodRangeCache  # noqa: E402
+from sdmx_csv import SDMX_TIME_COLUMN, read_sdmx_csv, sdmx_column_id, sdmx_dimension_columns  # noqa: E402
+from sdmx_keys import group_series_keys, parse_key  # noqa: E402
+
 
 def oecd_api_function(
     agency_identifier: str,
@@ -14,11 +29,34 @@ def oecd_api_function(
     startPeriod: str | None = None,
     endPeriod: str | None = None,
     dimensionAtObservation: str | None = None,
+    engine: str = "c",
+    period_cache: Optional[PeriodRangeCache] = None,
+    retry: bool = True,
+    use_response_cache: bool = True,
 ) -> pd.DataFrame:
     """
     Descargar datos de la OCDE (SDMX CSV) y devolver DataFrame.
+    engine: motor del lector SDMX-CSV compartido ("c" o "pyarrow").
+    period_cache: PeriodRangeCache opcional; solo se descargan los periodos
+    de [startPeriod, endPeriod] que no estén ya en caché.
+    retry: False desactiva los reintentos automáticos de la sesión HTTP
+    (p. ej. cuando cada intento debe contarse en la cuota).
+    use_response_cache: False no usa la caché de respuestas aunque esté
+    activa (las descargas de period_cache siempre la omiten).
     """
     data_identifier = f"{agency_identifier},{dataset_identifier},{dataset_version}"
+    if period_cache is not None:
+        def fetch(start: Optional[str], end: Optional[str]) -> pd.DataFrame:
+            return oecd_api_function(
+                agency_identifier, dataset_identifier, data_selection, base_url=base_url,
+                dataset_version=dataset_version, startPeriod=start, endPeriod=end,
+                dimensionAtObservation=dimensionAtObservation, engine=engine, retry=retry,
+                use_response_cache=False,
+            )
+
+        key = f"oecd|{base_url}/{data_identifier}/{data_selection}|{dimensionAtObservation or ''}"
+        return period_cache.get_frame(key, fetch, startPeriod, endPeriod)
+
     params: dict[str, str] = {}
     if startPeriod:
         params["startPeriod"] = startPeriod
@@ -28,11 +66,194 @@ def oecd_api_function(
         params["dimensionAtObservation"] = dimensionAtObservation
 
     url = f"{base_url}/{data_identifier}/{data_selection}"
-    resp = requests.get(url, params=params, headers={"Accept": "text/csv"}, timeout=180)
+    resp = http_get("oecd", url, params=params, headers={"Accept": "text/csv"}, retry=retry, cache=use_response_cache)
     resp.raise_for_status()
 
-    text_stream = io.StringIO(resp.content.decode("utf-8"))
-    df = pd.read_csv(text_stream)
-    return df
+    return read_sdmx_csv(resp.content, engine=engine)
+
+
+oecd_api_function_async = make_async(oecd_api_function, host="sdmx.oecd.org")
+
+
+class OecdQuotaLedger:
+    """
+    Registro persistente (SQLite) de las peticiones hechas a la OCDE en la
+    última hora, compartido entre ejecuciones y entre procesos: la
+    comprobación y la anotación se hacen en una misma transacción
+    (BEGIN IMMEDIATE), así que dos procesos no pueden gastar el mismo hueco.
+    acquire() espera hasta que haya cuota libre (o lanza RuntimeError si
+    wait=False) y anota la petición.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_requests_per_hour: int = 60) -> None:
+        if path is None:
+            path = os.path.join(os.path.expanduser("~"), ".cache", "apis", "oecd", "quota.sqlite")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_requests_per_hour = max_requests_per_hour
+        self._local = threading.local()
+        self._db().execute("CREATE TABLE IF NOT EXISTS requests (stamp REAL NOT NULL)")
+
+    def _db(self) -> sqlite3.Connection:
+        # Una conexión por hilo; transacciones explícitas (isolation_level=None)
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.db = db
+        return db
+
+    def remaining(self) -> int:
+        row = self._db().execute("SELECT COUNT(*) FROM requests WHERE stamp > ?", (time.time() - 3600,)).fetchone()
+        return max(0, self.max_requests_per_hour - row[0])
+
+    def acquire(self, wait: bool = True) -> None:
+        db = self._db()
+        while True:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                db.execute("DELETE FROM requests WHERE stamp <= ?", (now - 3600,))
+                count, oldest = db.execute("SELECT COUNT(*), MIN(stamp) FROM requests").fetchone()
+                if count < self.max_requests_per_hour:
+                    db.execute("INSERT INTO requests (stamp) VALUES (?)", (now,))
+                    db.execute("COMMIT")
+                    return
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            delay = oldest + 3600 - now
+            if not wait:
+                raise RuntimeError(f"Cuota horaria de la OCDE agotada; libre en {delay:.0f} s")
+            time.sleep(max(delay, 0.1))
+
+
+def _period_mask(periods: pd.Series, start: Optional[str], end: Optional[str]) -> np.ndarray:
+    # Comparación por prefijo: con start="2020", "2020-Q1" está dentro; con
+    # end="2020", también "2020-12"
+    mask = np.ones(len(periods), dtype=bool)
+    text = periods.astype(str)
+    if start:
+        mask &= (text.str[: len(start)] >= start).to_numpy()
+    if end:
+        mask &= (text.str[: len(end)] <= end).to_numpy()
+    return mask
+
+
+class OecdRequestScheduler:
+    """
+    Cola de peticiones a la OCDE que agrupa claves compatibles.
+
+    submit() registra una petición y devuelve un Future; run() agrupa las
+    pendientes por dataflow (agencia, dataset, versión), une sus claves en
+    selecciones con '+' (ver sdmx_keys.group_series_keys) con un
+    startPeriod/endPeriod que cubre a todas, las descarga respetando la
+    cuota horaria (OecdQuotaLedger) y resuelve cada Future con su parte del
+    resultado (filtrada por clave y periodo).
+
+    Los reintentos (429/5xx y errores de conexión, con backoff según
+    RETRY_SETTINGS) los hace el propio planificador y cada intento se anota
+    en la cuota. La cola de pendientes vive en memoria: lo enviado con
+    submit() y no ejecutado con run() se pierde al terminar el proceso.
+    """
+
+    def __init__(
+        self,
+        max_requests_per_hour: int = 60,
+        ledger_path: Optional[str] = None,
+        max_key_length: int = 1000,
+        base_url: str = "https://sdmx.oecd.org/public/rest/data",
+        engine: str = "c",
+        wait: bool = True,
+    ) -> None:
+        self.ledger = OecdQuotaLedger(ledger_path, max_requests_per_hour)
+        self.max_key_length = max_key_length
+        self.base_url = base_url
+        self.engine = engine
+        self.wait = wait
+        self.requests_made = 0
+        self._pending: List[Tuple[Tuple[str, str, str], str, Optional[str], Optional[str], Future]] = []
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        agency_identifier: str,
+        dataset_identifier: str,
+        data_selection: str,
+        startPeriod: Optional[str] = None,
+        endPeriod: Optional[str] = None,
+        dataset_version: str = "",
+    ) -> Future:
+        fut: Future = Future()
+        flow = (agency_identifier, dataset_identifier, dataset_version)
+        with self._lock:
+            self._pending.append((flow, data_selection, startPeriod, endPeriod, fut))
+        return fut
+
+    def _fetch(self, flow: Tuple[str, str, str], key: str, start: Optional[str], end: Optional[str]) -> pd.DataFrame:
+        agency, dataset, version = flow
+        attempt = 0
+        while True:
+            self.ledger.acquire(wait=self.wait)
+            self.requests_made += 1
+            try:
+                return oecd_api_function(
+                    agency, dataset, key, base_url=self.base_url, dataset_version=version,
+                    startPeriod=start, endPeriod=end, engine=self.engine, retry=False,
+                )
+            except (requests.HTTPError, requests.ConnectionError, requests.Timeout) as exc:
+                resp = getattr(exc, "response", None)
+                status = resp.status_code if resp is not None else None
+                if attempt >= RETRY_SETTINGS["total"] or (
+                    status is not None and status not in RETRY_SETTINGS["status_forcelist"]
+                ):
+                    raise
+                delay = min(RETRY_SETTINGS["backoff_factor"] * 2**attempt, RETRY_SETTINGS["backoff_max"])
+                retry_after = resp.headers.get("Retry-After", "") if resp is not None else ""
+                if retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+                attempt += 1
+                time.sleep(delay)
+
+    @staticmethod
+    def _slice(df: pd.DataFrame, selection: str, start: Optional[str], end: Optional[str]) -> pd.DataFrame:
+        if df.empty:
+            return df.copy()
+        mask = np.ones(len(df), dtype=bool)
+        for col, values in zip(sdmx_dimension_columns(list(df.columns)), parse_key(selection)):
+            if "" not in values:
+                mask &= df[col].map(sdmx_column_id).isin(values).to_numpy()
+        time_col = next((c for c in df.columns if sdmx_column_id(c) == SDMX_TIME_COLUMN), None)
+        if time_col is not None:
+            mask &= _period_mask(df[time_col], start, end)
+        return df[mask].reset_index(drop=True)
+
+    def run(self) -> int:
+        """Ejecutar las peticiones pendientes. Devuelve el número de llamadas hechas."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        made = self.requests_made
 
+        by_flow: Dict[Tuple[str, str, str], list] = {}
+        for item in pending:
+            by_flow.setdefault(item[0], []).append(item)
 
+        for flow, items in by_flow.items():
+            starts = [i[2] for i in items]
+            ends = [i[3] for i in items]
+            start = None if any(s is None for s in starts) else min(starts)
+            end = None if any(e is None for e in ends) else max(ends)
+            try:
+                frames = [
+                    self._fetch(flow, key, start, end)
+                    for key in group_series_keys([i[1] for i in items], max_key_length=self.max_key_length)
+                ]
+                frames = [f for f in frames if not f.empty]
+                combined = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+            except Exception as exc:
+                for item in items:
+                    item[4].set_exception(exc)
+                continue
+            for _, selection, s, e, fut in items:
+                fut.set_result(self._slice(combined, selection, s, e))
+        return self.requests_made - made
@@ -0,0 +1,25 @@
+import os
+# Ejemplo de uso — Our World in Data (espejo local en Parquet)
+# ----------------------------------------------------------------------------
+# 1) Actualizar el espejo local de varios gráficos (solo se descargan los que han cambiado)
+# 2) Cargar el panel desde disco, sin peticiones
+# ----------------------------------------------------------------------------
+from ourworldindata_function import ourworldindata_load_function, ourworldindata_mirror_function
+
+
+def main() -> None:
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    slugs = [
+        "labor-productivity-per-hour-pennworldtable",
+        "gdp-per-capita-worldbank",
+        "life-expectancy",
+    ]
+    report = ourworldindata_mirror_function(slugs, dest_dir="owid_mirror")
+    print({slug: r["status"] for slug, r in report.items()})
+
+    panel = ourworldindata_load_function(slugs, dest_dir="owid_mirror")
+    panel["life-expectancy"].to_csv("ourworldindata_example.csv", index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import pandas as pd
+import requests
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from async_fetch import make_async  # noqa: E402
+from http_session import http_get  # noqa: E402
+
+BASE_URL = "https://ourworldindata.org/grapher"
+HEADERS = {"User-Agent": "Our World In Data data fetch/1.0"}
+
+# Tipo de columna en el metadata de OWID -> dtype de pandas
+_OWID_DTYPES = {
+    "Integer": "Int64",
+    "Numeric": "float64",
+    "Float": "float64",
+    "Categorical": "category",
+    "Ordinal": "category",
+    "String": "category",
+}
+
+
+def _grapher_params(csv_type: str, short_names: bool) -> Dict[str, str]:
+    return {"v": "1", "csvType": csv_type, "useColumnShortNames": "true" if short_names else "false"}
+
+
+def ourworldindata_dtypes(metadata: Dict[str, Any]) -> Dict[str, str]:
+    """
+    dtypes de las columnas del CSV según el metadata del gráfico: Entity y
+    Code categóricas, Year entero, y cada indicador según su 'type'
+    (Integer -> Int64, Numeric -> float64, Categorical/Ordinal/String ->
+    category). Las columnas con otro tipo no se incluyen: pandas lo infiere.
+    """
+    dtypes = {"Entity": "category", "Code": "category", "Year": "int64"}
+    for name, col in (metadata.get("columns") or {}).items():
+        dtype = _OWID_DTYPES.get(str(col.get("type", "")))
+        if dtype is not None:
+            dtypes[name] = dtype
+    return dtypes
+
+
+def _read_grapher_csv(body: bytes, metadata: Dict[str, Any]) -> pd.DataFrame:
+    dtypes = ourworldindata_dtypes(metadata)
+    header = pd.read_csv(io.BytesIO(body), nrows=0).columns
+    read_types = {c: ("float64" if t in ("Int64", "int64") else t) for c, t in dtypes.items() if c in header}
+    df = pd.read_csv(io.BytesIO(body), dtype=read_types, keep_default_na=True)
+    for col in header:
+        # Enteros: se leen como float y se convierten si no hay decimales
+        target = dtypes.get(col)
+        if target in ("Int64", "int64") and (df[col].dropna() % 1 == 0).all():
+            df[col] = df[col].astype("int64" if target == "int64" and not df[col].isna().any() else "Int64")
+    if "Day" in df.columns:
+        df["Day"] = pd.to_datetime(df["Day"], errors="coerce")
+    return df
+
+
+def _fingerprint(metadata: Dict[str, Any]) -> str:
+    # Fecha de última actualización y versión de cada indicador del gráfico
+    cols = metadata.get("columns") or {}
+    return json.dumps(
+        {name: [c.get("lastUpdated"), c.get("owidVariableId"), c.get("version")] for name, c in sorted(cols.items())},
+        sort_keys=True,
+    )
+
+
+def ourworldindata_api_function(slug: str, csv_type: str = "full", short_names: bool = True) -> pd.DataFrame:
+    """
+    Descargar el CSV de un gráfico de OWID (grapher) con tipos derivados de
+    su metadata. El metadata completo queda en df.attrs["metadata"].
+    """
+    params = _grapher_params(csv_type, short_names)
+    meta = http_get("ourworldindata", f"{BASE_URL}/{slug}.metadata.json", params=params, headers=HEADERS, timeout=60)
+    meta.raise_for_status()
+    metadata = meta.json()
+    resp = http_get("ourworldindata", f"{BASE_URL}/{slug}.csv", params=params, headers=HEADERS)
+    resp.raise_for_status()
+    df = _read_grapher_csv(resp.content, metadata)
+    df.attrs["metadata"] = metadata
+    return df
+
+
+ourworldindata_api_function_async = make_async(ourworldindata_api_function, host="ourworldindata.org")
+
+
+def _storage_format() -> str:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return "pickle"
+    return "parquet"
+
+
+def _save_json(path: str, obj: Any) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def _default_dir(dest_dir: Optional[str]) -> str:
+    if dest_dir is None:
+        dest_dir = os.path.join(os.path.expanduser("~"), ".cache", "apis", "ourworldindata")
+    os.makedirs(dest_dir, exist_ok=True)
+    return dest_dir
+
+
+def ourworldindata_mirror_function(
+    slugs: Iterable[str],
+    dest_dir: Optional[str] = None,
+    max_workers: int = 8,
+    csv_type: str = "full",
+    force: bool = False,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Mantener un espejo local (Parquet) de varios gráficos de OWID.
+
+    Para cada slug se pide primero el metadata (con If-None-Match): si el
+    servidor responde 304, o si las fechas de actualización y versiones de
+    sus indicadores no han cambiado desde la última ejecución, el gráfico se
+    omite. Si ha cambiado se descarga el CSV (también con su ETag), se
+    aplican los tipos del metadata y se guarda como dest_dir/<slug>.parquet
+    (pickle si no está instalado pyarrow). Los gráficos se procesan en
+    paralelo (max_workers hilos).
+
+    Retorna
+    -------
+    dict
+        slug -> {'status': 'downloaded' | 'unchanged' | 'error', 'path',
+        'rows', y 'error' si falló}.
+    """
+    dest_dir = _default_dir(dest_dir)
+    state_path = os.path.join(dest_dir, "_owid_state.json")
+    state: Dict[str, Any] = {}
+    if os.path.exists(state_path):
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    fmt = _storage_format()
+    params = _grapher_params(csv_type, True)
+    lock = threading.Lock()
+
+    def mirror(slug: str) -> Dict[str, Any]:
+        previous = dict(state.get(slug, {}))
+        path = os.path.join(dest_dir, f"{slug}.{fmt}")
+        result: Dict[str, Any] = {"path": path}
+        have_file = os.path.exists(path) and previous.get("format") == fmt and not force
+        try:
+            headers = dict(HEADERS)
+            if have_file and previous.get("metadata_etag"):
+                headers["If-None-Match"] = previous["metadata_etag"]
+            meta = http_get("ourworldindata", f"{BASE_URL}/{slug}.metadata.json", params=params, headers=headers, timeout=60, cache=False)
+            if meta.status_code == 304:
+                result.update(status="unchanged", rows=previous.get("rows"))
+                return result
+            meta.raise_for_status()
+            metadata = meta.json()
+            fingerprint = _fingerprint(metadata)
+            entry = {**previous, "metadata_etag": meta.headers.get("ETag"), "fingerprint": fingerprint, "format": fmt}
+
+            if not (have_file and previous.get("fingerprint") == fingerprint):
+                headers = dict(HEADERS)
+                if have_file and previous.get("csv_etag"):
+                    headers["If-None-Match"] = previous["csv_etag"]
+                resp = http_get("ourworldindata", f"{BASE_URL}/{slug}.csv", params=params, headers=headers, cache=False)
+                if resp.status_code != 304:
+                    resp.raise_for_status()
+                    df = _read_grapher_csv(resp.content, metadata)
+                    tmp = f"{path}.tmp"
+                    if fmt == "parquet":
+                        df.to_parquet(tmp, index=False)
+                    else:
+                        df.to_pickle(tmp)
+                    os.replace(tmp, path)
+                    _save_json(os.path.join(dest_dir, f"{slug}.metadata.json"), metadata)
+                    entry.update(csv_etag=resp.headers.get("ETag"), rows=len(df))
+                    result.update(status="downloaded", rows=len(df))
+            result.setdefault("status", "unchanged")
+            result.setdefault("rows", entry.get("rows"))
+            with lock:
+                state[slug] = entry
+                _save_json(state_path, state)
+        except (requests.RequestException, OSError, ValueError) as exc:
+            result.update(status="error", error=str(exc))
+        return result
+
+    slugs = list(dict.fromkeys(slugs))
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        return dict(zip(slugs, pool.map(mirror, slugs)))
+
+
+def ourworldindata_load_function(
+    slugs: Union[str, Iterable[str], None] = None,
+    dest_dir: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+) -> Union[pd.DataFrame, Dict[str, pd.DataFrame]]:
+    """
+    Leer gráficos del espejo local (ver ourworldindata_mirror_function) sin
+    peticiones. Con un slug devuelve un DataFrame; con una lista (o None,
+    todos los del espejo) un dict slug -> DataFrame. columns limita las
+    columnas leídas (lectura columnar en Parquet).
+    """
+    dest_dir = _default_dir(dest_dir)
+    single = isinstance(slugs, str)
+    if slugs is None:
+        with open(os.path.join(dest_dir, "_owid_state.json"), "r", encoding="utf-8") as f:
+            slugs = list(json.load(f))
+    names = [slugs] if single else list(slugs)
+
+    frames: Dict[str, pd.DataFrame] = {}
+    for slug in names:
+        parquet = os.path.join(dest_dir, f"{slug}.parquet")
+        if os.path.exists(parquet):
+            frames[slug] = pd.read_parquet(parquet, columns=columns)
+        else:
+            df = pd.read_pickle(os.path.join(dest_dir, f"{slug}.pickle"))
+            frames[slug] = df[columns] if columns else df
+    return frames[names[0]] if single else frames
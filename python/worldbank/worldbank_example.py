@@ -1,12 +1,16 @@
 import os
+import sys
 # Ejemplo de uso — Banco Mundial (JSON -> DataFrame -> CSV)
 # ----------------------------------------------------------------------------
 # 1) Cargar la función
 # 2) Ejecutar la consulta indicando país(es) e indicador(es)
-# 3) Guardar el resultado como CSV
+# 3) Guardar el resultado como CSV y en el almacén columnar (Parquet)
 # ----------------------------------------------------------------------------
 from worldbank_function import worldbank_api_function
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from columnar_store import save_to_store  # noqa: E402
+
 
 def main() -> None:
     os.chdir(os.path.dirname(os.path.abspath(__file__)))
@@ -16,6 +20,7 @@ def main() -> None:
         date="2000:2023",
     )
     df.to_csv("worldbank_example.csv", index=False)
+    save_to_store(df, "worldbank", "NY.GDP.MKTP.KD.ZG")
 
 
 if __name__ == "__main__":
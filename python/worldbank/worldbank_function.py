@@ -1,27 +1,113 @@
 from __future__ import annotations
 
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Union
+
+import numpy as np
 import pandas as pd
-import requests
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from async_fetch import make_async  # noqa: E402
+from http_session import http_get  # noqa: E402
+
+
+def _join_codes(codes: Union[str, Iterable[str]]) -> str:
+    # "ESP", "ESP;FRA" o ["ESP", "FRA"] -> "ESP;FRA"
+    if isinstance(codes, str):
+        return codes
+    return ";".join(map(str, codes))
+
+
+def _worldbank_page(url: str, q: Dict[str, Any]) -> List[Any]:
+    resp = http_get("worldbank", url, params=q, headers={"Accept": "application/json"})
+    resp.raise_for_status()
+    obj = resp.json()
+    if not isinstance(obj, list) or len(obj) < 2 or obj[1] is None:
+        raise RuntimeError("Unexpected World Bank response structure; no data array present.")
+    return obj
+
+
+def _flat_frame(records: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Aplanar los registros del Banco Mundial columna a columna: indicator y
+    country -> *_id / *_label categóricas, value float64 y date entero
+    cuando todas las fechas son años (si no, categórica: "2020Q1", "2020M01").
+    """
+    def nested(field: str, key: str) -> pd.Categorical:
+        return pd.Categorical([(r.get(field) or {}).get(key) for r in records])
+
+    dates = [r.get("date") for r in records]
+    if all(isinstance(d, str) and d.isdigit() for d in dates):
+        date_col: Any = np.array(dates, dtype=np.int64)
+    else:
+        date_col = pd.Categorical(dates)
+    values = np.array([r.get("value") for r in records], dtype=object)
+    values[pd.isna(values)] = np.nan
+
+    return pd.DataFrame(
+        {
+            "indicator_id": nested("indicator", "id"),
+            "indicator_label": nested("indicator", "value"),
+            "country_id": nested("country", "id"),
+            "country_label": nested("country", "value"),
+            "countryiso3code": pd.Categorical([r.get("countryiso3code") for r in records]),
+            "date": date_col,
+            "value": values.astype(np.float64),
+            "unit": pd.Categorical([r.get("unit") for r in records]),
+            "obs_status": pd.Categorical([r.get("obs_status") for r in records]),
+            "decimal": np.array([r.get("decimal") or 0 for r in records], dtype=np.int64),
+        }
+    )
 
 
 def worldbank_api_function(
-    iso3: str,
-    indicator: str,
+    iso3: Union[str, Iterable[str]],
+    indicator: Union[str, Iterable[str]],
     date: str | None = None,
     per_page: int = 20000,
     base_url: str = "https://api.worldbank.org/v2",
+    source: int | None = None,
+    max_workers: int = 4,
+    flatten: bool = True,
 ) -> pd.DataFrame:
+    """
+    Datos de indicadores del Banco Mundial (API v2, JSON) como DataFrame.
+
+    iso3 e indicator aceptan un código, varios separados por ';' o una
+    lista; con varios indicadores la API exige 'source' (por defecto 2,
+    WDI). Se descargan todas las páginas: la primera informa de 'pages' y el
+    resto se piden en paralelo (max_workers hilos).
+
+    Con flatten=True (por defecto) el resultado es plano y tipado:
+    indicator_id/indicator_label y country_id/country_label categóricas,
+    value float64 y date entero (años). flatten=False devuelve los
+    registros tal cual (indicator y country como dicts).
+    """
+    iso3 = _join_codes(iso3)
+    indicator = _join_codes(indicator)
     path = f"/country/{iso3}/indicator/{indicator}"
     url = f"{base_url}{path}"
-    q = {"format": "json", "per_page": per_page}
+    q: Dict[str, Any] = {"format": "json", "per_page": per_page}
     if date:
         q["date"] = date
+    if source is None and ";" in indicator:
+        source = 2
+    if source is not None:
+        q["source"] = source
 
-    resp = requests.get(url, params=q, headers={"Accept": "application/json"}, timeout=120)
-    resp.raise_for_status()
-    obj = resp.json()
-    if not isinstance(obj, list) or len(obj) < 2 or obj[1] is None:
-        raise RuntimeError("Unexpected World Bank response structure; no data array present.")
-    return pd.DataFrame(obj[1])
+    first = _worldbank_page(url, q)
+    records = list(first[1])
+    pages = int(first[0].get("pages", 1) or 1) if isinstance(first[0], dict) else 1
+    if pages > 1:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            for obj in pool.map(lambda page: _worldbank_page(url, {**q, "page": page}), range(2, pages + 1)):
+                records.extend(obj[1])
+
+    if not flatten:
+        return pd.DataFrame(records)
+    return _flat_frame(records)
 
 
+worldbank_api_function_async = make_async(worldbank_api_function, host="api.worldbank.org")